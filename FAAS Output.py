@@ -1,6 +1,19 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 import os
+import time
+
+from faas_batch import period_of
+from faas_codes import encode_sheets, merge_encoded
+from faas_cube import build_cube
+from faas_dashboard import DEFAULT_DPI, VIEWS, start_dashboard
+from faas_export import EXPORT_FORMATS, export_tables
+from faas_history import period_arg
+from faas_instrument import RunReport
+from faas_margin import add_gross_margin, aggregate_per_project, merge_all
+from faas_money import minor_sheets, money_totals, to_display
+from faas_rank import DEFAULT_TOP_N, ranking_views
+from faas_sheets import group_revenue, read_sheets
+from faas_validate import ledger_summary, validate, write_ledger
 
 # ───────────────────────────────────────────────
 # 1.  FILE LOCATIONS  (🔄 change if needed)
@@ -9,147 +22,241 @@ file_path         = r"D:/OneDrive - valueonshore.com/Desktop/Allocation Working/
 output_excel_path = r"D:/OneDrive - valueonshore.com/Desktop/Allocation Working/FAAS/New/Gross_Margin_Output.xlsx"
 output_chart_path = r"D:/OneDrive - valueonshore.com/Desktop/Allocation Working/FAAS/New/Gross_Margin_Dashboard.png"
 
+# Read rows one at a time into per-project totals instead of loading whole sheets
+STREAM_INGEST = False
+
+# Keep cleaned sheets as Parquet so an unchanged workbook is not parsed again
+USE_SHEET_CACHE    = True
+SHEET_CACHE_DIR    = os.path.join(os.path.expanduser("~"), ".faas_cache")
+SHEET_CACHE_MAX_MB = 512
+
+# Recompute only the projects whose rows changed since the previous run
+INCREMENTAL_RECOMPUTE = False
+
+# Join on integer Project / Ownership codes instead of strings
+ENCODE_KEYS = True
+
+# Check the sheets and drop bad rows into a reject ledger (see faas_validate.py)
+VALIDATE = True
+
+# Money as int64 minor units (paise) from read to export, so totals are exact
+FIXED_POINT_MONEY = False
+MONEY_SCALE       = 100                 # minor units per ₹
+COST_ROUNDING     = "half_even"         # Salary × Involvement: "half_even" | "half_up" | "down"
+
+# Append every run's gm_df to the period-partitioned history (see faas_history.py)
+RECORD_HISTORY = True
+HISTORY_DIR    = os.path.join(os.path.expanduser("~"), ".faas_history")
+
+# Cost / Direct Expense split across a project's owners in the cube: "revenue" | "equal" | "primary"
+COST_ALLOCATION = "revenue"
+
+# Command-line options  (python "FAAS Output.py" --format csv)
+parser = argparse.ArgumentParser(description="Gross Margin calculator")
+parser.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx",
+                    help="xlsx workbook, or one Parquet/CSV file per sheet")
+parser.add_argument("--no-png", action="store_true",
+                    help="skip the PNG dashboard (matplotlib is never imported)")
+parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="PNG resolution")
+parser.add_argument("--png-top", type=int, default=None, metavar="N",
+                    help="plot the N best bars and group the rest as Other")
+parser.add_argument("--png-view", choices=VIEWS, default="project",
+                    help="one bar per project or per ownership")
+parser.add_argument("--rank", type=int, default=DEFAULT_TOP_N, metavar="N",
+                    help="top/bottom N sheets by GM %%, GM and Revenue (0 = none)")
+parser.add_argument("--period", type=period_arg, default=None, metavar="YYYY-MM",
+                    help="period of this run in the cube and history (default: from the path, else file date)")
+parser.add_argument("--fanout", action="store_true",
+                    help="also write one workbook + PNG per Ownership (see faas_fanout.py)")
+parser.add_argument("--profile", action="store_true",
+                    help="cProfile every stage and keep the slowest one's profile")
+parser.add_argument("--trace-memory", action="store_true",
+                    help="record each stage's own peak memory with tracemalloc (slower)")
+parser.add_argument("--warn-slow", type=float, default=None, metavar="SECONDS",
+                    help="warn when any stage takes longer (default: per-stage limits)")
+args = parser.parse_args()
+
+# The encoded path groups revenue by (Project, Ownership) itself, over codes
+encode_keys = ENCODE_KEYS and not STREAM_INGEST and not INCREMENTAL_RECOMPUTE
+fixed_point = FIXED_POINT_MONEY and not STREAM_INGEST and not INCREMENTAL_RECOMPUTE
+validating  = VALIDATE and not STREAM_INGEST
+period = args.period or period_of(file_path)
+
+# Invoices are rounded to paise one by one, so fixed point groups them afterwards;
+# validation needs one row per invoice too
+group_client = not encode_keys and not fixed_point
+read_grouped = group_client and not validating
+
 # ───────────────────────────────────────────────
 # 2.  READ & CLEAN SHEETS
 # ───────────────────────────────────────────────
-xls = pd.ExcelFile("D:/OneDrive - valueonshore.com/Desktop/Allocation Working/FAAS/New/FAAS Working File.xlsx")
-
-# Employee ─────────────────────────────────────
-employee_df = xls.parse("Employee")
-employee_df.columns = employee_df.columns.str.strip()
-employee_df["Salary"]      = pd.to_numeric(employee_df["Salary"], errors="coerce")
-employee_df["Involvement"] = pd.to_numeric(employee_df["Involvement"], errors="coerce")
-employee_df["Cost"]        = employee_df["Salary"] * employee_df["Involvement"]
-
-# Client (revenue) ─────────────────────────────
-client_raw = xls.parse("Clinet Name ", header=None)
-client_raw.columns = client_raw.iloc[0].str.strip()          # promote first row to header
-client_df = client_raw[1:].copy()
-client_df = client_df.rename(columns={"Client Name": "Project",
-                                      "Amount":      "Revenue"})
-client_df["Revenue"] = pd.to_numeric(client_df["Revenue"], errors="coerce")
-
-# ➡️  GROUP revenue in case of duplicate/valid invoices
-#client_df = client_df.groupby("Project", as_index=False)["Revenue"].sum()
-client_df = client_df.groupby(["Project", "Ownership"], as_index=False)["Revenue"].sum()
-
-# Direct Expense ───────────────────────────────
-direct_df = xls.parse("Direct Expense")
-direct_df.columns = direct_df.columns.str.strip()
-direct_df = direct_df.rename(columns={"Client": "Project",
-                                      "Amount": "Direct Expense"})
-direct_df["Direct Expense"] = pd.to_numeric(direct_df["Direct Expense"], errors="coerce")
+# Every stage below records wall/CPU time, peak memory and rows (see faas_instrument.py)
+report = RunReport(file_path, profile=args.profile, slow_seconds=args.warn_slow,
+                   trace_memory=args.trace_memory)
 
-# ───────────────────────────────────────────────
-# 3.  AGGREGATE COST & EXPENSE PER PROJECT
-# ───────────────────────────────────────────────
-project_costs    = employee_df.groupby("Project", as_index=False)["Cost"].sum()
-project_expenses = direct_df.groupby("Project",  as_index=False)["Direct Expense"].sum()
+if STREAM_INGEST:
+    # Rows go straight into per-project accumulators (see faas_stream.py)
+    from faas_stream import stream_workbook
+    with report.stage("2-3. stream read & aggregate") as st:
+        client_df, project_costs, project_expenses = st.out(stream_workbook(file_path))
+else:
+    if USE_SHEET_CACHE:
+        # Cleaned sheets come from the on-disk cache when the workbook is unchanged
+        from faas_cache import cached_sheets
+        with report.stage("2. read sheets (cache)") as st:
+            employee_df, client_df, direct_df = st.out(
+                cached_sheets(file_path, SHEET_CACHE_DIR, SHEET_CACHE_MAX_MB,
+                              group_client=read_grouped))
+    else:
+        # Employee / Client (revenue) / Direct Expense  (see faas_sheets.py)
+        employee_df, client_df, direct_df = read_sheets(file_path,
+                                                        group_client=read_grouped,
+                                                        report=report)
 
-# ───────────────────────────────────────────────
-# 4.  MERGE EVERYTHING  (full outer keeps all projects)
-# ───────────────────────────────────────────────
-#gm_df = (
-    #project_costs
-    #.merge(client_df,  on="Project", how="outer")
-    #.merge(project_expenses, on="Project", how="outer")
-#)
-gm_df = (
-    client_df
-    .merge(project_costs, on="Project", how="outer")
-    .merge(project_expenses, on="Project", how="outer")
-)
-
-# Fill blanks with zero
-for col in ["Cost", "Revenue", "Direct Expense"]:
-    gm_df[col] = pd.to_numeric(gm_df[col], errors="coerce").fillna(0)
+    if validating:
+        # Bad rows leave the sheets and go to the reject ledger
+        with report.stage("2. validate", (employee_df, client_df, direct_df)) as st:
+            employee_df, client_df, direct_df, rejects_df = validate(employee_df, client_df,
+                                                                      direct_df)
+            st.out(rejects_df)
+            if group_client:
+                client_df = group_revenue(client_df)
+        print(f"{'✅' if rejects_df.empty else '⚠️'} Validation: {ledger_summary(rejects_df)}")
+
+    if fixed_point:
+        # Amounts → integer paise once; Salary × Involvement rounded per row
+        with report.stage("2. money to minor units", (employee_df, client_df, direct_df)) as st:
+            employee_df, client_df, direct_df = st.out(
+                minor_sheets(employee_df, client_df, direct_df, MONEY_SCALE, COST_ROUNDING))
+            if not encode_keys:
+                client_df = group_revenue(client_df)
 
 # ───────────────────────────────────────────────
-# 5.  CALCULATE GROSS MARGIN
+# 3-5.  AGGREGATE → MERGE → GROSS MARGIN  (see faas_margin.py)
 # ───────────────────────────────────────────────
-gm_df["Gross Margin"]   = gm_df["Revenue"] - gm_df["Cost"] - gm_df["Direct Expense"]
-gm_df["Gross Margin %"] = gm_df.apply(
-    lambda r: (r["Gross Margin"] / r["Revenue"]) if r["Revenue"] else None,
-    axis=1
-).round(2)
+if INCREMENTAL_RECOMPUTE and not STREAM_INGEST:
+    # Only projects whose rows changed since the last run are recomputed
+    from faas_incremental import incremental_gross_margin
+    with report.stage("3-5. incremental recompute",
+                      (employee_df, client_df, direct_df)) as st:
+        gm_df = st.out(incremental_gross_margin(file_path, employee_df, client_df,
+                                                direct_df, SHEET_CACHE_DIR))
+elif encode_keys:
+    # 3-4.  Aggregate & merge over integer codes (see faas_codes.py)
+    with report.stage("3-4. aggregate & merge (codes)",
+                      (employee_df, client_df, direct_df)) as st:
+        gm_df = st.out(merge_encoded(encode_sheets(employee_df, client_df, direct_df),
+                                     keep_int=fixed_point))
+
+    # 5.  Calculate gross margin
+    with report.stage("5. gross margin", gm_df) as st:
+        gm_df = st.out(add_gross_margin(gm_df))
+else:
+    if not STREAM_INGEST:
+        # 3.  Aggregate cost & expense per project
+        with report.stage("3. aggregate", (employee_df, direct_df)) as st:
+            project_costs, project_expenses = st.out(
+                aggregate_per_project(employee_df, direct_df))
+
+    # 4.  Merge everything (full outer keeps all projects)
+    with report.stage("4. merge", (client_df, project_costs, project_expenses)) as st:
+        gm_df = st.out(merge_all(client_df, project_costs, project_expenses,
+                                 keep_int=fixed_point))
+
+    # 5.  Calculate gross margin
+    with report.stage("5. gross margin", gm_df) as st:
+        gm_df = st.out(add_gross_margin(gm_df))
+
+if fixed_point:
+    # Exact totals from the integer amounts, then ₹ for the outputs below
+    totals = money_totals(gm_df, MONEY_SCALE)
+    print("✅ Exact totals: " + ", ".join(f"{k} {v}" for k, v in totals.items()))
+    gm_df = to_display(gm_df, MONEY_SCALE)
 
 # Optional preview
 print("✅ Data preview:\n", gm_df.head())
 
+# 7. starts here: the PNG renders on a worker process while the Excel export runs
+png_job = None
+if not args.no_png:
+    png_started = time.perf_counter()
+    png_job = start_dashboard(gm_df, output_chart_path, dpi=args.dpi,
+                              top_n=args.png_top, view=args.png_view, rule=COST_ALLOCATION)
+
 # ───────────────────────────────────────────────
 # 6.  EXPORT TO EXCEL  (main sheet + pivot + chart)
 # ───────────────────────────────────────────────
-os.makedirs(os.path.dirname(output_excel_path), exist_ok=True)
-
-with pd.ExcelWriter(output_excel_path, engine="xlsxwriter") as writer:
-    # Main sheet
-    gm_df.to_excel(writer, sheet_name="Gross Margin", index=False)
-
-    wb  = writer.book
-    ws  = writer.sheets["Gross Margin"]
-
-    cur_fmt = wb.add_format({"num_format": "#,##0.00"})
-    pct_fmt = wb.add_format({"num_format": "0.00%"})
-
-    #ws.set_column("B:B", 14, cur_fmt)    # Cost
-    #ws.set_column("C:D", 14, cur_fmt)    # Revenue & Direct Expense
-    #ws.set_column("E:E", 16, cur_fmt)    # Gross Margin
-    #ws.set_column("F:F", 16, pct_fmt)    # Gross Margin %
-    ws.set_column("C:C", 14, cur_fmt)  # Cost
-    ws.set_column("D:E", 14, cur_fmt)  # Revenue & Direct Expense
-    ws.set_column("F:F", 16, cur_fmt)  # Gross Margin
-    ws.set_column("G:G", 16, pct_fmt)  # Gross Margin %
-
-    # Pivot: average GM % by project
-    pivot_df = (
-        gm_df.pivot_table(index="Project",
-                          values="Gross Margin %",
-                          aggfunc="mean")
-        .reset_index()
-        .sort_values("Gross Margin %", ascending=False)
-    )
-    pivot_df.to_excel(writer, sheet_name="GM % Pivot", index=False)
-
-    ws_piv = writer.sheets["GM % Pivot"]
-    ws_piv.set_column("A:A", 25)
-    ws_piv.set_column("B:B", 16, pct_fmt)
-
-    # Column chart for GM % in pivot sheet
-    chart = wb.add_chart({'type': 'column'})
-    max_row = len(pivot_df)
-    chart.add_series({
-        'name':       'Gross Margin %',
-        'categories': ['GM % Pivot', 1, 0, max_row, 0],  # Project names
-        'values':     ['GM % Pivot', 1, 1, max_row, 1],  # GM %
-        'data_labels': {'value': False},
-    })
-    chart.set_title({'name': 'Gross Margin % by Project'})
-    chart.set_x_axis({'name': 'Project'})
-    chart.set_y_axis({'name': 'Gross Margin %'})
-    chart.set_legend({'none': True})
-    ws_piv.insert_chart('D2', chart,
-                        {'x_scale': 2.0, 'y_scale': 1.4,
-                         'x_offset': 20, 'y_offset': 10})
-
-print(f"✅ Excel saved to {output_excel_path}")
+# Project × Ownership × Period cube; pivots are served from it (see faas_cube.py)
+with report.stage("6. cube", gm_df) as st:
+    cube = build_cube({period: gm_df}, COST_ALLOCATION)
+    st.out(cube.levels[("Period", "Project", "Ownership")])
+
+with report.stage("6. pivot") as st:
+    pivot_df = st.out(cube.gm_pct_pivot())
+
+# Top / bottom N by GM %, GM and Revenue, overall and per Ownership (see faas_rank.py)
+rank_views = []
+if args.rank > 0:
+    with report.stage("6. ranking", gm_df) as st:
+        rank_views = ranking_views(gm_df, args.rank, rule=COST_ALLOCATION)
+        st.out([v.frame for v in rank_views])
+
+print(f"⏳ Exporting ({args.format}) …")
+with report.stage(f"6. export ({args.format})", gm_df) as st:
+    export_stats = export_tables(gm_df, output_excel_path, args.format, pivot_df, rank_views,
+                                 rejects_df if validating else None)
+    st["sheets"] = export_stats
+
+if validating and args.format == "xlsx":
+    # The ledger also as a file of its own (other formats already wrote one)
+    rejects_path = write_ledger(rejects_df, output_excel_path)
+    print(f"✅ Reject ledger ({len(rejects_df):,} rows) saved to {rejects_path}")
+
+for path in dict.fromkeys(s["path"] for s in export_stats):
+    print(f"✅ {'Excel' if args.format == 'xlsx' else args.format.upper()} saved to {path}")
 
 # ───────────────────────────────────────────────
 # 7.  PNG BAR CHART OF GROSS MARGIN ₹
 # ───────────────────────────────────────────────
-plt.figure(figsize=(10, 6))
-plt.bar(gm_df["Project"], gm_df["Gross Margin"])
-plt.xlabel("Project")
-plt.ylabel("Gross Margin")
-plt.title("Gross Margin per Project")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
-plt.savefig(output_chart_path, dpi=300)
-plt.close()
-
-print(f"✅ PNG chart saved to {output_chart_path}")
+if png_job is not None:
+    png_status = png_job.result()
+    report.add("7. png chart", time.perf_counter() - png_started, rows_in=len(gm_df),
+               background=True, status=png_status)
+    if png_status == "unchanged":
+        print(f"✅ PNG chart unchanged, kept {output_chart_path}")
+    else:
+        print(f"✅ PNG chart saved to {output_chart_path}")
+
+# ───────────────────────────────────────────────
+# 8.  HISTORY  (one partition per period)
+# ───────────────────────────────────────────────
+if RECORD_HISTORY:
+    from faas_history import HistoryStore
+    with report.stage("8. history append", gm_df):
+        HistoryStore(HISTORY_DIR).append(period, gm_df, workbook=file_path)
+    print(f"✅ Stored {period} in history {HISTORY_DIR}")
+
+# ───────────────────────────────────────────────
+# 9.  PER-OWNERSHIP REPORTS  (worker pool)
+# ───────────────────────────────────────────────
+if args.fanout:
+    from faas_fanout import fan_out_isolated
+    fanout_dir = os.path.join(os.path.dirname(output_excel_path) or ".", "By Ownership")
+    with report.stage("9. per-ownership reports", gm_df):
+        manifest_path = fan_out_isolated(gm_df, fanout_dir, png=not args.no_png, dpi=args.dpi,
+                                         png_top=args.png_top, rank=args.rank)
+    print(f"✅ Per-ownership manifest saved to {manifest_path}")
+
+# Run report (JSON) next to the outputs
+report_path = report.write(os.path.dirname(output_excel_path) or ".",
+                           options=vars(args), output=output_excel_path,
+                           exact_totals=totals if fixed_point else None,
+                           rejects=len(rejects_df) if validating else None)
+print(f"✅ Run report saved to {report_path}\n{report.summary()}")
 
 # Auto-open the Excel file (Windows only; ignore on Mac/Linux)
-try:
-    os.startfile(output_excel_path)
-except AttributeError:
-    pass
\ No newline at end of file
+if args.format == "xlsx":
+    try:
+        os.startfile(output_excel_path)
+    except AttributeError:
+        pass
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Batch mode: regenerate Gross Margin outputs for many monthly workbooks.
+
+Each workbook is run through read → validate → aggregate → merge → export on a process
+pool (one worker per CPU by default).  Workers are recycled every few months
+so memory stays bounded, a failing month is recorded instead of stopping the
+batch, and a consolidated cross-month summary is written at the end.
+
+    python faas_batch.py "D:/.../FAAS/2024-*/FAAS Working File.xlsx" --out D:/.../FAAS
+    python faas_batch.py D:/.../FAAS/Monthly --out D:/.../FAAS/Batch --workers 8
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from faas_dashboard import render_dashboard
+from faas_export import export_excel
+from faas_history import HistoryStore
+from faas_margin import compute_gross_margin, project_totals
+from faas_sheets import group_revenue, read_sheets
+from faas_validate import validate, write_ledger
+
+OUTPUT_XLSX  = "Gross_Margin_Output.xlsx"
+OUTPUT_PNG   = "Gross_Margin_Dashboard.png"
+SUMMARY_XLSX = "Gross_Margin_Summary.xlsx"
+
+# Months handled by a worker before it is replaced (releases pandas memory)
+MAX_TASKS_PER_CHILD = 4
+
+MEASURES = ["Revenue", "Cost", "Direct Expense", "Gross Margin"]
+
+PERIOD_RE = re.compile(r"(20\d{2})[-_ ]?(0[1-9]|1[0-2])(?!\d)")
+
+
+# ───────────────────────────────────────────────
+# Input discovery
+# ───────────────────────────────────────────────
+def find_workbooks(spec):
+    """Workbooks under a directory (recursive) or matching a glob."""
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "**", "*.xlsx"), recursive=True)
+    else:
+        paths = glob.glob(spec, recursive=True)
+    skip = {OUTPUT_XLSX, SUMMARY_XLSX}
+    return sorted(p for p in paths
+                  if os.path.basename(p) not in skip and not os.path.basename(p).startswith("~$"))
+
+
+def period_of(path):
+    """YYYY-MM from the path (last match wins), else from the file's mtime."""
+    matches = PERIOD_RE.findall(path.replace("\\", "/"))
+    if matches:
+        year, month = matches[-1]
+        return f"{year}-{month}"
+    return datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m")
+
+
+def plan_periods(paths):
+    """[(period, path)] with duplicate periods disambiguated by file name."""
+    plan, seen = [], set()
+    for path in paths:
+        period = period_of(path)
+        if period in seen:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            period = f"{period} ({stem})"
+        seen.add(period)
+        plan.append((period, path))
+    return plan
+
+
+# ───────────────────────────────────────────────
+# One month  (runs in a worker process)
+# ───────────────────────────────────────────────
+def run_month(period, path, out_dir, png=True, keep_gm=False):
+    t0 = time.perf_counter()
+    # Months already run one per CPU, so a worker does not start sheet workers of its own
+    employee_df, client_df, direct_df = read_sheets(path, group_client=False, parallel=False)
+    employee_df, client_df, direct_df, rejects_df = validate(employee_df, client_df, direct_df)
+    gm_df = compute_gross_margin(employee_df, group_revenue(client_df), direct_df)
+
+    month_dir = os.path.join(out_dir, period)
+    export_excel(gm_df, os.path.join(month_dir, OUTPUT_XLSX), rejects_df=rejects_df)
+    write_ledger(rejects_df, os.path.join(month_dir, OUTPUT_XLSX))
+    if png:
+        render_dashboard(gm_df, os.path.join(month_dir, OUTPUT_PNG))
+
+    per_project = project_totals(gm_df)            # cost counted once per project
+    totals = per_project[MEASURES].sum()
+    return {
+        "Period": period, "Workbook": path, "Status": "ok", "Error": "",
+        "Projects": int(gm_df["Project"].nunique()),
+        "Rejected Rows": int((rejects_df["Action"] == "rejected").sum()),
+        **{m: float(totals[m]) for m in MEASURES},
+        "Seconds": round(time.perf_counter() - t0, 3),
+        "by_project": per_project["Gross Margin"],
+        **({"gm_df": gm_df} if keep_gm else {}),
+    }
+
+
+def _run_month_safe(period, path, out_dir, png, keep_gm=False):
+    t0 = time.perf_counter()
+    try:
+        return run_month(period, path, out_dir, png, keep_gm)
+    except Exception as exc:                 # one bad month must not stop the batch
+        return {
+            "Period": period, "Workbook": path, "Status": "error",
+            "Error": f"{type(exc).__name__}: {exc}",
+            "Traceback": traceback.format_exc(),
+            "Seconds": round(time.perf_counter() - t0, 3),
+        }
+
+
+# ───────────────────────────────────────────────
+# Batch driver
+# ───────────────────────────────────────────────
+def run_batch(paths, out_dir, workers=None, png=True, history_dir=None):
+    """Run every workbook on a process pool; returns per-month results by period.
+
+    With ``history_dir`` each month's gm_df is also appended to that
+    ``faas_history`` store (by this process, so writes never race).
+    """
+    plan = plan_periods(paths)
+    store = HistoryStore(history_dir) if history_dir else None
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(plan)))
+    results = []
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers,
+                             max_tasks_per_child=MAX_TASKS_PER_CHILD) as pool:
+        futures = {pool.submit(_run_month_safe, period, path, out_dir, png,
+                               store is not None): (period, path)
+                   for period, path in plan}
+        for fut in as_completed(futures):
+            period, path = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as exc:         # worker died (e.g. out of memory)
+                res = {"Period": period, "Workbook": path, "Status": "error",
+                       "Error": f"{type(exc).__name__}: {exc}", "Seconds": None}
+            mark = "✅" if res["Status"] == "ok" else "❌"
+            print(f"{mark} {period}: {res['Error'] or 'done'} ({res['Seconds']}s)")
+            gm_df = res.pop("gm_df", None)
+            if gm_df is not None:
+                try:
+                    store.append(period, gm_df, workbook=path)
+                except ValueError as exc:    # e.g. "2024-05 (copy)"
+                    print(f"⚠️  {period}: left out of the history ({exc})")
+            results.append(res)
+
+    results.sort(key=lambda r: r["Period"])
+    print(f"✅ {len(plan)} months on {workers} workers in {time.perf_counter() - t0:.1f}s")
+    return results
+
+
+def write_summary(results, out_dir):
+    """Cross-month summary: totals per period, GM per project × period, errors."""
+    rows = [{k: v for k, v in r.items() if k not in ("by_project", "Traceback")}
+            for r in results]
+    summary_df = pd.DataFrame(rows)
+    if "Revenue" in summary_df:
+        rev = summary_df["Revenue"].where(summary_df["Revenue"] != 0)
+        summary_df["Gross Margin %"] = (summary_df["Gross Margin"] / rev).round(2)
+
+    months = [r["by_project"].rename(r["Period"]) for r in results if r["Status"] == "ok"]
+    by_month = pd.concat(months, axis=1, sort=False) if months else pd.DataFrame()
+    try:
+        by_month = by_month.sort_index()
+    except TypeError:       # numeric and text project keys: numbers first, then text (as faas_codes)
+        by_month = by_month.sort_index(key=lambda keys: pd.Index(
+            [(isinstance(k, str), k) for k in keys], tupleize_cols=False))
+    by_month.index.name = "Project"
+
+    path = os.path.join(out_dir, SUMMARY_XLSX)
+    os.makedirs(out_dir, exist_ok=True)
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, sheet_name="Summary", index=False)
+        if not by_month.empty:
+            by_month.to_excel(writer, sheet_name="Gross Margin by Month")
+        errors = [r for r in results if r["Status"] != "ok"]
+        if errors:
+            pd.DataFrame([{"Period": r["Period"], "Workbook": r["Workbook"],
+                           "Error": r["Error"], "Traceback": r.get("Traceback", "")}
+                          for r in errors]).to_excel(writer, sheet_name="Errors", index=False)
+    print(f"✅ Summary saved to {path}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gross Margin batch over monthly workbooks")
+    parser.add_argument("inputs", help="directory of monthly workbooks or a glob pattern")
+    parser.add_argument("--out", required=True, help="output root; one YYYY-MM folder per month")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--no-png", action="store_true", help="skip the PNG dashboards")
+    parser.add_argument("--history", default=None, metavar="DIR",
+                        help="also append every month to this history store")
+    args = parser.parse_args(argv)
+
+    paths = find_workbooks(args.inputs)
+    if not paths:
+        parser.error(f"no workbooks found for {args.inputs!r}")
+    results = run_batch(paths, args.out, args.workers, png=not args.no_png,
+                        history_dir=args.history)
+    write_summary(results, args.out)
+    return 0 if all(r["Status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
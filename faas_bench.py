@@ -0,0 +1,265 @@
+"""
+Benchmark suite: synthetic FAAS workbooks + per-stage timings.
+
+``generate_workbook`` writes a workbook with the real layout (Employee,
+the misspelled "Clinet Name " sheet with its header row to promote, and
+Direct Expense), including a small share of dirty cells.  The runner times
+every numbered stage of ``FAAS Output.py`` separately across a size ladder,
+each size in a fresh process so peak RSS is per size, and appends one JSON
+line per size to a results file so runs can be compared over time.
+``--check-ledger`` instead checks that every dirty cell the generator wrote
+is rejected by the validation stage.
+
+    python faas_bench.py                              # 1k → 1M ladder
+    python faas_bench.py --ladder 1000 10000 --no-png --out bench.jsonl
+    python faas_bench.py --check-ledger
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from faas_codes import encode_sheets, merge_encoded
+from faas_dashboard import render_dashboard
+from faas_export import export_excel
+from faas_instrument import peak_rss_mb, rss_mb
+from faas_margin import add_gross_margin, aggregate_per_project, merge_all
+from faas_sheets import CLIENT_SHEET, DIRECT_SHEET, EMPLOYEE_SHEET, read_sheets
+from faas_stream import stream_workbook
+from faas_validate import FIRST_ROW, validate
+
+LADDER = [1_000, 10_000, 100_000, 1_000_000]
+
+RESULTS_FILE = "bench_results.jsonl"
+
+
+# ───────────────────────────────────────────────
+# Synthetic workbook
+# ───────────────────────────────────────────────
+def ladder_sizes(rows):
+    """Sheet sizes for one rung: ``rows`` Employee lines, the rest scaled from it."""
+    return {
+        "employees":  rows,
+        "projects":   max(10, rows // 100),
+        "ownerships": max(3, min(50, rows // 1_000)),
+        "invoices":   max(1, rows // 2),
+        "expenses":   max(1, rows // 4),
+    }
+
+
+def generate_workbook(path, employees, projects, ownerships, invoices, expenses,
+                      seed=0, dirty=0.01):
+    """Write a workbook with the FAAS layout; ``dirty`` is the share of bad cells."""
+    rng = np.random.default_rng(seed)
+    project_names = np.array([f"Client {i:05d}" for i in range(projects)], dtype=object)
+    owner_names   = np.array([f"Owner {i:02d}" for i in range(ownerships)], dtype=object)
+    project_owner = rng.integers(0, ownerships, projects)
+
+    def messy(values, bad="n/a"):
+        values = values.astype(object)
+        values[rng.random(len(values)) < dirty] = bad
+        return values
+
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+
+    # Employee ─────────────────────────────────────
+    ws = wb.add_worksheet(EMPLOYEE_SHEET)
+    ws.write_row(0, 0, ["Employee Name", "Project ", "Salary", "Involvement"])
+    emp_project = rng.integers(0, projects, employees)
+    salary      = messy(rng.integers(20_000, 250_000, employees).astype(float))
+    involvement = messy(rng.choice([0.1, 0.25, 0.5, 0.75, 1.0], employees), bad="")
+    for r, row in enumerate(zip((f"E{i // 2:06d}" for i in range(employees)),
+                                project_names[emp_project], salary, involvement), start=1):
+        ws.write_row(r, 0, row)
+
+    # Client (revenue) — header row is data, promoted by the reader ────────
+    ws = wb.add_worksheet(CLIENT_SHEET)
+    ws.write_row(0, 0, ["Invoice No", "Client Name ", "Ownership", " Amount"])
+    inv_project = rng.integers(0, projects, invoices)
+    amount      = messy(np.round(rng.lognormal(12, 1, invoices), 2))
+    for r, row in enumerate(zip((f"INV{i:07d}" for i in range(invoices)),
+                                project_names[inv_project],
+                                owner_names[project_owner[inv_project]], amount), start=1):
+        ws.write_row(r, 0, row)
+
+    # Direct Expense ───────────────────────────────
+    ws = wb.add_worksheet(DIRECT_SHEET)
+    ws.write_row(0, 0, ["Client", "Amount", "Description"])
+    exp_project = rng.integers(0, projects, expenses)
+    exp_amount  = messy(np.round(rng.lognormal(8, 1, expenses), 2))
+    for r, row in enumerate(zip(project_names[exp_project], exp_amount,
+                                (f"Line {i}" for i in range(expenses))), start=1):
+        ws.write_row(r, 0, row)
+
+    wb.close()
+    return path
+
+
+def workbook_for(rows, work_dir, seed=0):
+    """Generate (or reuse) the workbook for one ladder rung."""
+    os.makedirs(work_dir, exist_ok=True)
+    path = os.path.join(work_dir, f"faas_bench_{rows}_s{seed}.xlsx")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        generate_workbook(path, seed=seed, **ladder_sizes(rows))
+        print(f"🛠  generated {path} in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return path
+
+
+# ───────────────────────────────────────────────
+# Stage timings  (one workbook, this process)
+# ───────────────────────────────────────────────
+class StageClock:
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, fn, *args):
+        rss0 = rss_mb()
+        t0, c0 = time.perf_counter(), time.process_time()
+        out = fn(*args)
+        rss1, peak = rss_mb(), peak_rss_mb()
+        self.stages.append({
+            "stage": name,
+            "wall_s": round(time.perf_counter() - t0, 4),
+            "cpu_s": round(time.process_time() - c0, 4),
+            "rss_delta_mb": None if rss0 is None or rss1 is None else round(rss1 - rss0, 1),
+            "process_peak_rss_mb": None if peak is None else round(peak, 1),   # so far, not per stage
+        })
+        return out
+
+
+def bench_workbook(workbook, out_dir, png=True):
+    clock = StageClock()
+
+    # Numbered stages of the pandas path
+    employee_df, client_df, direct_df = clock.run("2. read & clean", read_sheets, workbook)
+    costs, expenses = clock.run("3. aggregate", aggregate_per_project, employee_df, direct_df)
+    gm_df = clock.run("4. merge", merge_all, client_df, costs, expenses)
+    gm_df = clock.run("5. gross margin", add_gross_margin, gm_df)
+    clock.run("6. excel export", export_excel, gm_df, os.path.join(out_dir, "bench.xlsx"))
+    if png:
+        clock.run("7. png chart", render_dashboard, gm_df, os.path.join(out_dir, "bench.png"))
+
+    # Alternative paths, for comparison
+    clock.run("alt: streaming read + aggregate", stream_workbook, workbook)
+    _, raw_client, _ = read_sheets(workbook, group_client=False)
+    clock.run("alt: encoded aggregate + merge", lambda: merge_encoded(
+        encode_sheets(employee_df, raw_client, direct_df)))
+
+    return {"gm_rows": len(gm_df), "stages": clock.stages}
+
+
+# ───────────────────────────────────────────────
+# Ledger check  (dirty cells → rejected rows)
+# ───────────────────────────────────────────────
+# Number columns per sheet, as the generator writes their headers
+DIRTY_COLUMNS = {EMPLOYEE_SHEET: ["Salary", "Involvement"],
+                 CLIENT_SHEET:   [" Amount"],
+                 DIRECT_SHEET:   ["Amount"]}
+
+
+def dirty_rows(workbook):
+    """{sheet: workbook rows with a "n/a" or blank number cell}, read as plain text."""
+    rows = {}
+    for sheet, columns in DIRTY_COLUMNS.items():
+        raw = pd.read_excel(workbook, sheet_name=sheet, usecols=columns,
+                            dtype=object, keep_default_na=False)
+        dirty = raw.isin(["n/a", ""]).any(axis=1).to_numpy()
+        rows[sheet] = set((np.flatnonzero(dirty) + FIRST_ROW).tolist())
+    return rows
+
+
+def check_ledger(work_dir, rows=1_000, seed=0, dirty=0.02):
+    """Generate a dirty workbook and check the ledger rejects exactly its dirty rows."""
+    os.makedirs(work_dir, exist_ok=True)
+    workbook = generate_workbook(os.path.join(work_dir, f"faas_dirty_{rows}_s{seed}.xlsx"),
+                                 seed=seed, dirty=dirty, **ladder_sizes(rows))
+    *_, ledger_df = validate(*read_sheets(workbook, group_client=False))
+    rejected = ledger_df[ledger_df["Check"] == "missing or non-numeric"]
+    ok = True
+    for sheet, expected in dirty_rows(workbook).items():
+        got = set(rejected.loc[rejected["Sheet"] == sheet.strip(), "Row"].astype(int))
+        print(f"{'✅' if got == expected else '❌'} {sheet.strip()}: {len(expected):,} dirty rows,"
+              f" {len(got):,} rejected")
+        ok = ok and got == expected
+    return ok
+
+
+# ───────────────────────────────────────────────
+# Ladder driver  (one subprocess per rung)
+# ───────────────────────────────────────────────
+def _run_isolated(workbook, png):
+    cmd = [sys.executable, os.path.abspath(__file__), "--one", workbook]
+    if not png:
+        cmd.append("--no-png")
+    done = subprocess.run(cmd, capture_output=True, text=True)
+    if done.returncode != 0:
+        raise RuntimeError(done.stderr)
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "pandas": pd.__version__,
+            "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(), "commit": commit}
+
+
+def run_ladder(ladder, work_dir, results_file, png=True, seed=0):
+    env = _environment()
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    for rows in ladder:
+        workbook = workbook_for(rows, work_dir, seed)
+        result = _run_isolated(workbook, png)
+        record = {"run_at": started, "rows": rows, "sizes": ladder_sizes(rows),
+                  "seed": seed, "workbook_mb": round(os.path.getsize(workbook) / 2**20, 2),
+                  **env, **result}
+        with open(results_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        print(f"\n📏 {rows:,} employee rows ({record['workbook_mb']} MB)")
+        for s in result["stages"]:
+            print(f"   {s['stage']:<34} {s['wall_s']:>9.3f}s  RSS change {s['rss_delta_mb']} MB"
+                  f"  (process peak {s['process_peak_rss_mb']} MB)")
+    print(f"\n✅ Results appended to {results_file}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmarks on synthetic workbooks")
+    parser.add_argument("--ladder", type=int, nargs="+", default=LADDER,
+                        help="Employee row counts to run (default: 1k 10k 100k 1M)")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "faas_bench"),
+                        help="where generated workbooks and outputs are kept")
+    parser.add_argument("--out", default=RESULTS_FILE, help="JSON-lines results file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-png", action="store_true")
+    parser.add_argument("--check-ledger", action="store_true",
+                        help="check that the dirty cells of a generated workbook are all rejected")
+    parser.add_argument("--one", metavar="WORKBOOK", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.check_ledger:
+        return 0 if check_ledger(args.work_dir, seed=args.seed) else 1
+    if args.one:                            # child process: one workbook, JSON on stdout
+        out_dir = tempfile.mkdtemp(prefix="faas_bench_out_")
+        print(json.dumps(bench_workbook(args.one, out_dir, png=not args.no_png)))
+        return 0
+    run_ladder(args.ladder, args.work_dir, args.out, png=not args.no_png, seed=args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+"""
+On-disk cache of the cleaned sheets, keyed by workbook fingerprint.
+
+A workbook is first matched on (size, mtime); when that misses, its SHA-256
+is compared so a touched-but-unchanged file still hits.  Each sheet then has
+its own key built from the CRC/size of its XML part inside the .xlsx (plus the
+shared-strings part), so editing one sheet only re-parses that sheet.  Frames
+are stored as Parquet (pickle when a column cannot be written as Arrow) and
+the oldest entries are evicted once the cache grows past its size budget.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from faas_sheets import CLEANERS, clean_sheets, group_revenue
+
+# Bump when the cleaning in faas_sheets.py changes so old entries are ignored
+CACHE_VERSION = 5
+
+MANIFEST = "manifest.json"
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL  = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG  = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+# ───────────────────────────────────────────────
+# Fingerprints
+# ───────────────────────────────────────────────
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def sheet_keys(path):
+    """Per-sheet content keys read from the .xlsx zip directory (no XML parse of cells)."""
+    with zipfile.ZipFile(path) as zf:
+        book = ET.fromstring(zf.read("xl/workbook.xml"))
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {r.get("Id"): r.get("Target") for r in rels.iter(f"{_NS_PKG}Relationship")}
+        infos = {i.filename: i for i in zf.infolist()}
+
+        shared = infos.get("xl/sharedStrings.xml")
+        shared_part = f"{shared.CRC:08x}{shared.file_size:x}" if shared else ""
+
+        keys = {}
+        for sheet in book.iter(f"{_NS_MAIN}sheet"):
+            target = targets.get(sheet.get(f"{_NS_REL}id"), "")
+            member = target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+            info = infos.get(member)
+            if info is None:
+                continue
+            raw = f"{CACHE_VERSION}|{sheet.get('name')}|{info.CRC:08x}{info.file_size:x}|{shared_part}"
+            keys[sheet.get("name")] = hashlib.sha256(raw.encode()).hexdigest()[:24]
+    return keys
+
+
+# ───────────────────────────────────────────────
+# Cache store
+# ───────────────────────────────────────────────
+class SheetCache:
+    def __init__(self, cache_dir, max_mb=512):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    # Manifest ─────────────────────────────────────
+    def save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def fingerprint(self, path):
+        """Sheet keys for the workbook, reusing the last ones if the file is unchanged."""
+        st = os.stat(path)
+        entry = self.manifest.get(os.path.abspath(path))
+        if entry and entry.get("version") != CACHE_VERSION:
+            entry = None                        # keys embed the version they were built with
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sheets"]
+
+        digest = file_sha256(path)
+        if entry and entry["size"] == st.st_size and entry["sha256"] == digest:
+            keys = entry["sheets"]
+        else:
+            keys = sheet_keys(path)
+        self.manifest[os.path.abspath(path)] = {
+            "version": CACHE_VERSION,
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha256": digest, "sheets": keys,
+        }
+        return keys
+
+    # Entries ──────────────────────────────────────
+    def _stem(self, sheet, key):
+        slug = "".join(c if c.isalnum() else "_" for c in sheet.strip()).lower()
+        return os.path.join(self.cache_dir, f"{slug}-{key}")
+
+    def get(self, sheet, key):
+        for ext, read in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+            path = self._stem(sheet, key) + ext
+            if os.path.exists(path):
+                os.utime(path)                  # LRU: last use = mtime
+                return read(path)
+        return None
+
+    def put(self, sheet, key, df):
+        stem = self._stem(sheet, key)
+        try:
+            df.to_parquet(stem + ".parquet", index=False)
+        except Exception:                       # pyarrow missing or mixed-type column
+            if os.path.exists(stem + ".parquet"):
+                os.remove(stem + ".parquet")
+            df.to_pickle(stem + ".pkl")
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its budget."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((".parquet", ".pkl")):
+                p = os.path.join(self.cache_dir, name)
+                st = os.stat(p)
+                files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(p)
+            total -= size
+
+
+# ───────────────────────────────────────────────
+# Public entry point
+# ───────────────────────────────────────────────
+def cached_sheets(path, cache_dir, max_mb=512, group_client=True, parallel=None):
+    """Return (employee_df, client_df, direct_df), parsing only sheets that changed.
+
+    Client rows are cached one per invoice and grouped here unless
+    ``group_client=False``.  Sheets that miss are parsed like ``read_sheets``
+    does (``parallel`` defaults to on for large workbooks).
+    """
+    t0 = time.perf_counter()
+    cache = SheetCache(cache_dir, max_mb)
+    keys = cache.fingerprint(path)
+
+    found = {}
+    for sheet in CLEANERS:
+        key = keys.get(sheet)
+        found[sheet] = cache.get(sheet, key) if key else None
+    missing = [sheet for sheet, df in found.items() if df is None]
+    if missing:
+        for sheet, df in clean_sheets(path, missing, parallel).items():
+            if keys.get(sheet):
+                cache.put(sheet, keys[sheet], df)
+            found[sheet] = df
+    frames = [found[sheet] for sheet in CLEANERS]
+    parsed = [sheet.strip() for sheet in missing]
+
+    if parsed:
+        cache.evict()
+    cache.save_manifest()
+    status = f"parsed {', '.join(parsed)}" if parsed else "all sheets from cache"
+    print(f"✅ Sheets loaded in {time.perf_counter() - t0:.2f}s ({status})")
+    if group_client:
+        frames[1] = group_revenue(frames[1])
+    return tuple(frames)
@@ -0,0 +1,163 @@
+"""
+Integer key encoding for the Project / Ownership joins.
+
+Project and Ownership are factorized once per sheet into a shared, sorted
+dictionary.  The per-project groupbys then become reductions over dense
+integer codes and the two outer merges become array indexing over a single
+project index; strings are only decoded back when gm_df is materialized for
+export.  The result is identical to steps 3-4 of the pandas path.
+"""
+import numpy as np
+import pandas as pd
+
+
+# ───────────────────────────────────────────────
+# Dictionary
+# ───────────────────────────────────────────────
+def _factorize(values):
+    """(codes, uniques) with -1 for missing keys — one hash pass per column."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    return codes, pd.Index(uniques)
+
+
+def _sorted_keys(keys):
+    """Keys in the order ``merge(how="outer")`` / ``groupby`` give them.
+
+    Text mixed with numeric codes (e.g. "A" and 101) cannot be compared, so
+    pandas puts the numbers first, then the text, each sorted; same here.
+    """
+    try:
+        return keys.sort_values()
+    except TypeError:
+        order = sorted(range(len(keys)), key=lambda i: (isinstance(keys[i], str), keys[i]))
+        return keys.take(order)
+
+
+class KeyDictionary:
+    """Sorted dictionary of keys shared by several columns."""
+
+    def __init__(self, *uniques):
+        keys = uniques[0]
+        for u in uniques[1:]:
+            keys = keys.union(u, sort=False)
+        self.keys = _sorted_keys(keys)           # merge/groupby order
+
+    def __len__(self):
+        return len(self.keys)
+
+    def recode(self, codes, uniques):
+        """Map column-local codes onto this dictionary (-1 stays -1)."""
+        lookup = np.append(self.keys.get_indexer(uniques), -1)
+        return lookup[codes]
+
+    def decode(self, codes, missing=False):
+        """Keys for ``codes``; with ``missing`` a -1 code decodes to NaN."""
+        if not missing:
+            return self.keys.take(codes)
+        return self.keys.take(codes, allow_fill=True, fill_value=np.nan)
+
+
+# ───────────────────────────────────────────────
+# Reductions over codes
+# ───────────────────────────────────────────────
+def code_sum(codes, values, n):
+    """Per-code sum of ``values`` (missing skipped) for codes ``0..n-1``.
+
+    Same compensated summation, in the same row order, as ``groupby().sum()``
+    so totals match the string-keyed path bit for bit; plain ``np.bincount``
+    sums naively and drifts in the last digits.
+    """
+    valid = codes >= 0
+    cat = pd.Categorical.from_codes(codes[valid], categories=pd.RangeIndex(n))
+    return pd.Series(values[valid]).groupby(cat, observed=False).sum().to_numpy()
+
+
+def code_present(codes, n):
+    return np.bincount(codes[codes >= 0], minlength=n) > 0
+
+
+# ───────────────────────────────────────────────
+# Encoded sheets
+# ───────────────────────────────────────────────
+class EncodedSheets:
+    """Project / Ownership codes plus the value columns of the three sheets."""
+
+    def __init__(self, employee_df, client_df, direct_df):
+        emp_p,  emp_u  = _factorize(employee_df["Project"])
+        cli_p,  cli_u  = _factorize(client_df["Project"])
+        cli_o,  cli_ou = _factorize(client_df["Ownership"])
+        dir_p,  dir_u  = _factorize(direct_df["Project"])
+
+        self.projects  = KeyDictionary(cli_u, emp_u, dir_u)
+        self.owners    = KeyDictionary(cli_ou)
+
+        self.emp_project    = self.projects.recode(emp_p, emp_u)
+        self.client_project = self.projects.recode(cli_p, cli_u)
+        self.client_owner   = self.owners.recode(cli_o, cli_ou)
+        self.direct_project = self.projects.recode(dir_p, dir_u)
+
+        self.cost    = employee_df["Cost"].to_numpy()
+        self.revenue = client_df["Revenue"].to_numpy()
+        self.expense = direct_df["Direct Expense"].to_numpy()
+
+
+def encode_sheets(employee_df, client_df, direct_df):
+    return EncodedSheets(employee_df, client_df, direct_df)
+
+
+# ───────────────────────────────────────────────
+# Aggregate + merge over codes  (steps 3-4)
+# ───────────────────────────────────────────────
+def _fill(values, present, keep_int=False):
+    """fillna(0) after an outer merge: ints survive only if nothing was missing.
+
+    With ``keep_int`` (fixed-point money) integer columns always stay integer.
+    """
+    if present.all():
+        return values
+    out = values.copy() if keep_int and values.dtype.kind == "i" else values.astype(float)
+    out[~present] = 0.0
+    return out
+
+
+def merge_encoded(enc, keep_int=False):
+    """gm_df (Project, Ownership, Revenue, Cost, Direct Expense) from codes."""
+    P, O = len(enc.projects), max(len(enc.owners), 1)
+
+    # 3.  Aggregate cost & expense per project
+    cost    = code_sum(enc.emp_project, enc.cost, P)
+    expense = code_sum(enc.direct_project, enc.expense, P)
+    has_cost    = code_present(enc.emp_project, P)
+    has_expense = code_present(enc.direct_project, P)
+
+    # Revenue per (Project, Ownership); pairs sort like groupby([...])
+    both = (enc.client_project >= 0) & (enc.client_owner >= 0)
+    pair = np.where(both, enc.client_project.astype(np.int64) * O + enc.client_owner, -1)
+    pairs, pair_codes = np.unique(pair[both], return_inverse=True)
+    pair_codes_full = np.full(len(pair), -1, dtype=np.int64)
+    pair_codes_full[both] = pair_codes
+    revenue = code_sum(pair_codes_full, enc.revenue, len(pairs))
+    pair_project, pair_owner = pairs // O, pairs % O
+
+    # 4.  Outer merge = one row per pair + one row per project without revenue
+    has_revenue = np.zeros(P, dtype=bool)
+    has_revenue[pair_project] = True
+    lone = np.flatnonzero((has_cost | has_expense) & ~has_revenue)
+
+    row_project = np.concatenate([pair_project, lone])
+    row_owner   = np.concatenate([pair_owner, np.full(len(lone), -1)])
+    row_revenue = np.concatenate([revenue, np.zeros(len(lone), dtype=revenue.dtype)])
+    row_has_rev = np.concatenate([np.ones(len(pairs), bool), np.zeros(len(lone), bool)])
+    order = np.argsort(row_project, kind="stable")
+    row_project, row_owner = row_project[order], row_owner[order]
+    row_revenue, row_has_rev = row_revenue[order], row_has_rev[order]
+
+    # Decode back to strings only here, for export
+    gm_df = pd.DataFrame({
+        "Project":        enc.projects.decode(row_project),
+        "Ownership":      enc.owners.decode(row_owner, missing=True),
+        "Revenue":        _fill(row_revenue, row_has_rev, keep_int),
+        "Cost":           _fill(cost[row_project], has_cost[row_project], keep_int),
+        "Direct Expense": _fill(expense[row_project], has_expense[row_project], keep_int),
+    })
+    return gm_df
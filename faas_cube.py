@@ -0,0 +1,170 @@
+"""
+Project x Ownership x Period aggregate cube.
+
+Built once per run from gm_df (or from several periods of the history
+store).  The finest cells hold the additive measures — Revenue, Cost,
+Direct Expense — per (Period, Project, Ownership).  Cost and Direct Expense
+are per project in gm_df, so they are split across the project's owners by
+``COST_ALLOCATION``:
+
+    "revenue"  in proportion to each owner's revenue (equal split if the
+               project has no revenue)
+    "equal"    the same share for every owner of the project
+    "primary"  everything to the owner with the most revenue
+
+Every coarser level (all 8 subsets of the three dimensions) is
+materialized up front with Gross Margin and GM % derived from the sums, so
+``view`` / ``pivot`` only select and reshape small frames.  "Mean GM %" is
+the plain average of gm_df's row GM %, which the GM % Pivot sheet shows.
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from faas_engine import gross_margin, gross_margin_pct
+
+DIMS = ("Period", "Project", "Ownership")
+MEASURES = ["Revenue", "Cost", "Direct Expense"]
+ALLOCATION_RULES = ("revenue", "equal", "primary")
+COST_ALLOCATION = "revenue"
+NO_OWNER = "(none)"
+
+# Additive helpers behind "Mean GM %"
+_PCT_SUM, _PCT_N = "_pct_sum", "_pct_n"
+
+
+# ───────────────────────────────────────────────
+# Finest cells
+# ───────────────────────────────────────────────
+def allocation_shares(projects, revenue, rule=COST_ALLOCATION):
+    """Share of its project's Cost / Direct Expense for each gm_df row (shares sum to 1)."""
+    if rule not in ALLOCATION_RULES:
+        raise ValueError(f"Unknown allocation rule {rule!r}; expected one of {ALLOCATION_RULES}")
+    codes, uniques = pd.factorize(projects)
+    n = len(uniques)
+    rows = np.bincount(codes, minlength=n)[codes]
+    equal = 1.0 / rows
+    if rule == "equal":
+        return equal
+    if rule == "revenue":
+        total = np.bincount(codes, weights=revenue, minlength=n)[codes]
+        share = np.divide(revenue, total, out=equal.copy(), where=total != 0)
+        return share
+    # "primary": the row with the most revenue (first on ties) takes it all
+    order = np.lexsort((np.arange(len(codes)), -revenue, codes))
+    first = order[np.r_[True, codes[order][1:] != codes[order][:-1]]] if len(order) else order
+    share = np.zeros(len(codes))
+    share[first] = 1.0
+    return share
+
+
+def allocate(gm_df, period, rule=COST_ALLOCATION):
+    """Finest cells of one period: gm_df rows with Cost / Direct Expense allocated."""
+    revenue = gm_df["Revenue"].to_numpy(dtype=float)
+    share = allocation_shares(gm_df["Project"], revenue, rule)
+    pct = gm_df["Gross Margin %"].to_numpy(dtype=float) if "Gross Margin %" in gm_df \
+        else gross_margin_pct(gross_margin(revenue, gm_df["Cost"].to_numpy(dtype=float),
+                                           gm_df["Direct Expense"].to_numpy(dtype=float)), revenue)
+    return pd.DataFrame({
+        "Period":         period,
+        "Project":        gm_df["Project"].to_numpy(),
+        "Ownership":      gm_df["Ownership"].fillna(NO_OWNER).to_numpy(),
+        "Revenue":        revenue,
+        "Cost":           gm_df["Cost"].to_numpy(dtype=float) * share,
+        "Direct Expense": gm_df["Direct Expense"].to_numpy(dtype=float) * share,
+        _PCT_SUM:         np.nan_to_num(pct, nan=0.0),
+        _PCT_N:           (~np.isnan(pct)).astype(np.int64),
+    })
+
+
+# ───────────────────────────────────────────────
+# Cube
+# ───────────────────────────────────────────────
+def _derive(frame):
+    frame["Gross Margin"] = gross_margin(frame["Revenue"].to_numpy(), frame["Cost"].to_numpy(),
+                                         frame["Direct Expense"].to_numpy())
+    frame["Gross Margin %"] = gross_margin_pct(frame["Gross Margin"].to_numpy(),
+                                               frame["Revenue"].to_numpy())
+    n = frame.pop(_PCT_N).to_numpy()
+    total = frame.pop(_PCT_SUM).to_numpy()
+    frame["Mean GM %"] = np.divide(total, n, out=np.full(len(n), np.nan), where=n > 0)
+    return frame
+
+
+class Cube:
+    """Materialized rollups; ``levels[dims]`` is one frame indexed by ``dims``."""
+
+    def __init__(self, cells, rule=COST_ALLOCATION):
+        self.rule = rule
+        self.periods = list(pd.unique(cells["Period"]))
+        additive = MEASURES + [_PCT_SUM, _PCT_N]
+        self.levels = {}
+        for k in range(len(DIMS) + 1):
+            for dims in combinations(DIMS, k):
+                if dims:
+                    frame = cells.groupby(list(dims), sort=True)[additive].sum()
+                else:
+                    frame = cells[additive].sum().to_frame().T
+                self.levels[dims] = _derive(frame)
+        self._pivots = {}
+
+    @staticmethod
+    def _dims(names):
+        names = [names] if isinstance(names, str) else list(names or ())
+        unknown = set(names) - set(DIMS)
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {sorted(unknown)}; expected {DIMS}")
+        return tuple(d for d in DIMS if d in names)
+
+    def view(self, by=(), where=None):
+        """Rollup by dimensions ``by``, optionally restricted to ``where={dim: value}``."""
+        where = dict(where or {})
+        by = self._dims(by)
+        frame = self.levels[self._dims(list(by) + list(where))]
+        if not where:
+            return frame
+        index = frame.index if isinstance(frame.index, pd.MultiIndex) \
+            else pd.MultiIndex.from_arrays([frame.index])
+        mask = np.ones(len(frame), dtype=bool)
+        for dim, value in where.items():                 # compare level codes, not keys
+            i = index.names.index(dim)
+            level = index.levels[i]
+            mask &= index.codes[i] == (level.get_loc(value) if value in level else -2)
+        frame = frame[mask]
+        if by:
+            return frame.droplevel([d for d in frame.index.names if d not in by])
+        return frame.reset_index(drop=True)
+
+    def pivot(self, index, columns=None, measure="Gross Margin %", where=None):
+        """``measure`` with ``index`` down and ``columns`` across (memoized)."""
+        key = (index, columns, measure, tuple(sorted((where or {}).items())))
+        out = self._pivots.get(key)
+        if out is None:
+            by = [index] + ([columns] if columns else [])
+            out = self.view(by, where)[measure]
+            out = out.unstack(columns) if columns else out.to_frame()
+            self._pivots[key] = out
+        return out
+
+    def gm_pct_pivot(self, period=None):
+        """The "GM % Pivot" sheet: average row GM % by project, best first."""
+        where = {"Period": period} if period is not None else None
+        frame = self.view("Project", where)
+        return (
+            frame["Mean GM %"].rename("Gross Margin %").reset_index()
+            .dropna(subset=["Gross Margin %"])
+            .sort_values("Gross Margin %", ascending=False)
+        )
+
+
+def build_cube(frames, rule=COST_ALLOCATION):
+    """Cube from ``{period: gm_df}``."""
+    cells = pd.concat([allocate(gm_df, period, rule) for period, gm_df in frames.items()],
+                      ignore_index=True)
+    return Cube(cells, rule)
+
+
+def cube_from_history(store, rule=COST_ALLOCATION, start=None, end=None):
+    """Cube over the periods of a ``faas_history.HistoryStore``."""
+    return build_cube({p: store.read(p) for p in store.periods(start, end)}, rule)
@@ -0,0 +1,173 @@
+"""
+Step 7 of ``FAAS Output.py``: the Gross Margin PNG dashboard.
+
+matplotlib is only imported (with the Agg backend) inside the process that
+actually renders, so runs that skip the PNG never pay for it.  The main
+script renders on a separate worker process while the Excel export runs, and
+a digest of the plotted data is stored next to the PNG so an unchanged chart
+is not rendered again.
+
+The worker is started as ``python faas_dashboard.py …`` rather than through
+multiprocessing, so it never re-imports the (unguarded) main script.
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from faas_cube import COST_ALLOCATION, NO_OWNER, allocation_shares
+from faas_engine import gross_margin
+from faas_margin import project_totals
+
+VIEWS = ("project", "ownership")
+
+DEFAULT_DPI = 300
+
+
+# ───────────────────────────────────────────────
+# What to plot
+# ───────────────────────────────────────────────
+def plot_data(gm_df, view="project", top_n=None, rule=COST_ALLOCATION):
+    """Gross Margin per Project (or Ownership); beyond ``top_n`` bars the rest become "Other".
+
+    A project's Cost / Direct Expense sit on each of its Ownership rows, so
+    projects are totalled with ``project_totals`` and owners are charged
+    their ``rule`` share of it, as in the cube.
+    """
+    if view == "project":
+        data = project_totals(gm_df)["Gross Margin"]
+    else:
+        revenue = gm_df["Revenue"].to_numpy(dtype=float)
+        share = allocation_shares(gm_df["Project"], revenue, rule)
+        gm = gross_margin(revenue, gm_df["Cost"].to_numpy(dtype=float) * share,
+                          gm_df["Direct Expense"].to_numpy(dtype=float) * share)
+        data = pd.Series(gm, index=gm_df["Ownership"].fillna(NO_OWNER).to_numpy())
+        data = data.groupby(level=0, sort=False).sum()
+    if top_n and len(data) > top_n:
+        data = data.sort_values(ascending=False)
+        other = pd.Series({f"Other ({len(data) - top_n})": data.iloc[top_n:].sum()})
+        data = pd.concat([data.iloc[:top_n], other])
+    return data
+
+
+def digest(data, dpi, view):
+    h = hashlib.sha256(f"{dpi}|{view}|".encode())
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _digest_path(png_path):
+    return png_path + ".sha256"
+
+
+def is_current(png_path, data_digest):
+    """True if ``png_path`` was last rendered from the same data and options."""
+    try:
+        with open(_digest_path(png_path), encoding="ascii") as f:
+            return os.path.exists(png_path) and f.read().strip() == data_digest
+    except OSError:
+        return False
+
+
+# ───────────────────────────────────────────────
+# 7.  PNG BAR CHART OF GROSS MARGIN ₹
+# ───────────────────────────────────────────────
+def render_png(data, output_chart_path, dpi=DEFAULT_DPI, view="project", data_digest=None):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    label = "Project" if view == "project" else "Ownership"
+    width = min(max(10, 0.3 * len(data)), 60)         # keep bars readable
+    plt.figure(figsize=(width, 6))
+    plt.bar(data.index.astype(str), data.to_numpy())
+    plt.xlabel(label)
+    plt.ylabel("Gross Margin")
+    plt.title(f"Gross Margin per {label}")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(output_chart_path, dpi=dpi)
+    plt.close()
+
+    if data_digest:
+        with open(_digest_path(output_chart_path), "w", encoding="ascii") as f:
+            f.write(data_digest)
+
+
+def render_dashboard(gm_df, output_chart_path, dpi=DEFAULT_DPI, top_n=None, view="project",
+                     rule=COST_ALLOCATION):
+    """Render in this process; returns "rendered" or "unchanged"."""
+    data = plot_data(gm_df, view, top_n, rule)
+    data_digest = digest(data, dpi, view)
+    if is_current(output_chart_path, data_digest):
+        return "unchanged"
+    render_png(data, output_chart_path, dpi, view, data_digest)
+    return "rendered"
+
+
+# ───────────────────────────────────────────────
+# Background rendering
+# ───────────────────────────────────────────────
+class DashboardJob:
+    """Handle for a render running in a worker process."""
+
+    def __init__(self, output_chart_path, proc=None, data_file=None):
+        self.path = output_chart_path
+        self.proc = proc
+        self.data_file = data_file
+
+    def result(self):
+        """Wait for the worker; returns "rendered" or "unchanged"."""
+        if self.proc is None:
+            return "unchanged"
+        try:
+            _, err = self.proc.communicate()
+        finally:
+            os.remove(self.data_file)
+        if self.proc.returncode != 0:
+            raise RuntimeError(f"Dashboard render failed:\n{err.decode(errors='replace')}")
+        return "rendered"
+
+
+def start_dashboard(gm_df, output_chart_path, dpi=DEFAULT_DPI, top_n=None, view="project",
+                    rule=COST_ALLOCATION):
+    """Start rendering on a worker process and return a ``DashboardJob``."""
+    data = plot_data(gm_df, view, top_n, rule)
+    data_digest = digest(data, dpi, view)
+    if is_current(output_chart_path, data_digest):
+        return DashboardJob(output_chart_path)
+
+    os.makedirs(os.path.dirname(output_chart_path) or ".", exist_ok=True)
+    fd, data_file = tempfile.mkstemp(suffix=".pkl", prefix="faas_dashboard_")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), data_file, output_chart_path,
+         "--dpi", str(dpi), "--view", view, "--digest", data_digest],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    return DashboardJob(output_chart_path, proc, data_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Gross Margin dashboard PNG")
+    parser.add_argument("data_file", help="pickled Series from plot_data()")
+    parser.add_argument("output_chart_path")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--view", choices=VIEWS, default="project")
+    parser.add_argument("--digest", default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.data_file, "rb") as f:
+        data = pickle.load(f)
+    render_png(data, args.output_chart_path, args.dpi, args.view, args.digest)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
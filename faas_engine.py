@@ -0,0 +1,152 @@
+"""
+Vectorized Gross Margin engine.
+
+Works on aligned Revenue / Cost / Direct Expense arrays, so batch jobs and
+notebooks can call it on millions of rows without the Excel I/O around
+``FAAS Output.py``.  Arrays of any shape are accepted (e.g. periods x
+projects), and rows of many periods or entities can be stacked and rolled up
+by any combination of integer keys in one call.
+
+Zero revenue: Gross Margin % is undefined there and comes back as NaN (a
+blank cell in the workbook) unless ``zero_revenue`` says otherwise.  NaN
+revenue gives NaN.
+"""
+import numpy as np
+import pandas as pd
+
+ROLLUP_COLUMNS = ["Revenue", "Cost", "Direct Expense", "Gross Margin",
+                  "Gross Margin %", "Mean GM %", "Rows"]
+
+
+# ───────────────────────────────────────────────
+# Row level
+# ───────────────────────────────────────────────
+def gross_margin(revenue, cost, expense):
+    """Revenue - Cost - Direct Expense, element-wise."""
+    return np.subtract(np.subtract(revenue, cost), expense)
+
+
+def gross_margin_pct(gm, revenue, zero_revenue=np.nan, decimals=None):
+    """GM / Revenue; ``zero_revenue`` where Revenue is 0, optionally rounded."""
+    gm, revenue = np.broadcast_arrays(np.asarray(gm, dtype=float), np.asarray(revenue))
+    pct = np.full(gm.shape, zero_revenue, dtype=float)
+    np.divide(gm, revenue, out=pct, where=revenue != 0)
+    return pct if decimals is None else np.round(pct, decimals)
+
+
+def margin(revenue, cost, expense, zero_revenue=np.nan, decimals=None):
+    """(Gross Margin, Gross Margin %) for aligned arrays."""
+    gm = gross_margin(revenue, cost, expense)
+    return gm, gross_margin_pct(gm, revenue, zero_revenue, decimals)
+
+
+# ───────────────────────────────────────────────
+# Rollups over integer keys
+# ───────────────────────────────────────────────
+def _key_arrays(keys, sizes):
+    """(list of int64 code arrays, sizes) from one code array or a tuple of them."""
+    if isinstance(keys, np.ndarray) and keys.ndim == 1:
+        keys = (keys,)
+    keys = [np.asarray(k, dtype=np.int64) for k in keys]
+    if sizes is None:
+        sizes = [int(k.max()) + 1 if len(k) else 0 for k in keys]
+    return keys, tuple(sizes)
+
+
+def _group_codes(keys, sizes):
+    """One flat group code per row from one or more code arrays (-1 = drop the row)."""
+    keys, sizes = _key_arrays(keys, sizes)
+    valid = np.logical_and.reduce([k >= 0 for k in keys])
+    flat = np.full(len(keys[0]), -1, dtype=np.int64)
+    if valid.any():
+        flat[valid] = np.ravel_multi_index([k[valid] for k in keys], sizes)
+    return flat, sizes
+
+
+def rollup_groups(keys, revenue, cost, expense, sizes=None, pct=None, zero_revenue=np.nan):
+    """Totals for the groups that occur, as (flat group ids, dict of 1-D arrays).
+
+    Only observed key combinations are reduced, so memory follows the number
+    of groups, not the size of the key grid (e.g. 100k projects x 2k owners).
+    Group ids are ``np.ravel_multi_index`` of the keys over ``sizes``,
+    ascending; ``np.unravel_index(ids, sizes)`` gives the keys back.  The
+    arrays are the ones listed in ``rollup``.
+    """
+    flat, sizes = _group_codes(keys, sizes)
+    valid = flat >= 0
+    ids, codes = np.unique(flat[valid], return_inverse=True)
+    n = len(ids)
+
+    revenue = np.asarray(revenue)
+    cost, expense = np.asarray(cost), np.asarray(expense)
+    gm = gross_margin(revenue, cost, expense)
+    if pct is None:
+        pct = gross_margin_pct(gm, revenue, zero_revenue)
+    pct = np.asarray(pct, dtype=float)
+
+    def total(values):
+        return np.bincount(codes, weights=values[valid], minlength=n)
+
+    out = {
+        "Revenue":        total(revenue),
+        "Cost":           total(cost),
+        "Direct Expense": total(expense),
+        "Gross Margin":   total(gm),
+        "Rows":           np.bincount(codes, minlength=n),
+    }
+    out["Gross Margin %"] = gross_margin_pct(out["Gross Margin"], out["Revenue"], zero_revenue)
+
+    has_pct = ~np.isnan(pct[valid])
+    pct_sum = np.bincount(codes[has_pct], weights=pct[valid][has_pct], minlength=n)
+    pct_n   = np.bincount(codes[has_pct], minlength=n)
+    out["Mean GM %"] = np.divide(pct_sum, pct_n, out=np.full(n, np.nan), where=pct_n > 0)
+    return ids, out
+
+
+def rollup(keys, revenue, cost, expense, sizes=None, pct=None, zero_revenue=np.nan):
+    """Totals per group, for every cell of the key grid.
+
+    ``keys`` is one code array or a tuple of them, e.g. ``(period, project)``;
+    ``sizes`` the number of codes per key (default: max code + 1).  Returns a
+    dict of arrays shaped like the grid:
+
+    * Revenue, Cost, Direct Expense, Gross Margin: sums
+    * Gross Margin %: weighted, i.e. sum(GM) / sum(Revenue)
+    * Mean GM %: unweighted mean of the row GM % (``pct``, computed if not
+      given); rows without a GM % are skipped, all-missing groups are NaN
+    * Rows: row count
+
+    The grid is dense; for many sparse key combinations use ``rollup_groups``.
+    """
+    keys, sizes = _key_arrays(keys, sizes)
+    ids, totals = rollup_groups(keys, revenue, cost, expense, sizes, pct, zero_revenue)
+    n = int(np.prod(sizes))
+    empty = {"Gross Margin %": zero_revenue, "Mean GM %": np.nan}
+    out = {}
+    for col, values in totals.items():
+        grid = np.full(n, empty.get(col, 0), dtype=values.dtype if col == "Rows" else float)
+        grid[ids] = values
+        out[col] = grid.reshape(sizes)
+    return out
+
+
+def rollup_frame(gm_df, by, pct=None, zero_revenue=np.nan):
+    """``rollup`` on a gm_df-like frame, grouped by column names ``by``.
+
+    One row per non-empty group, sorted by the keys; missing keys are
+    dropped, like ``groupby``.  Stack several periods in one frame and pass
+    e.g. ``by=["Period", "Project"]``.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    codes, uniques = zip(*(pd.factorize(gm_df[c], sort=True) for c in by))
+    sizes = [len(u) for u in uniques]
+    if pct is not None:
+        pct = gm_df[pct].to_numpy(dtype=float) if isinstance(pct, str) else pct
+    ids, totals = rollup_groups(codes, gm_df["Revenue"].to_numpy(), gm_df["Cost"].to_numpy(),
+                                gm_df["Direct Expense"].to_numpy(), sizes, pct, zero_revenue)
+
+    idx = np.unravel_index(ids, sizes)
+    out = pd.DataFrame({c: pd.Index(u).take(i) for c, u, i in zip(by, uniques, idx)})
+    for col in ROLLUP_COLUMNS:
+        out[col] = totals[col]
+    return out
@@ -0,0 +1,274 @@
+"""
+Export step 6 of ``FAAS Output.py``: the Excel workbook (step 7 is in faas_dashboard.py).
+
+The workbook is written with xlsxwriter's ``constant_memory`` mode, one row
+at a time, so memory stays flat however many rows gm_df has.  The same
+sheets can be emitted as Parquet or CSV instead.
+"""
+import os
+import time
+
+import xlsxwriter
+
+from faas_engine import rollup_frame
+from faas_instrument import rss_mb
+
+
+# ───────────────────────────────────────────────
+# Per-sheet stats  (wall time + RSS change)
+# ───────────────────────────────────────────────
+class SheetTimer:
+    """Collects one stats row per exported sheet and prints it (unless ``quiet``).
+
+    Sheets are written one after another, so each sheet's RSS change is
+    measured from the previous ``record`` (or from when the timer was made).
+    """
+
+    def __init__(self, quiet=False):
+        self.stats = []
+        self.quiet = quiet
+        self._rss = rss_mb()
+
+    def record(self, sheet, rows, t0, path):
+        rss = rss_mb()
+        delta = None if rss is None or self._rss is None else rss - self._rss
+        self._rss = rss
+        row = {"sheet": sheet, "rows": rows, "seconds": round(time.perf_counter() - t0, 3),
+               "rss_delta_mb": None if delta is None else round(delta, 1), "path": path}
+        self.stats.append(row)
+        if self.quiet:
+            return
+        mem = "" if delta is None else f", RSS {delta:+,.0f} MB"
+        print(f"   • {sheet}: {rows:,} rows in {row['seconds']:.2f}s{mem}")
+
+
+# ───────────────────────────────────────────────
+# 6.  EXPORT TO EXCEL  (main sheet + pivot + chart)
+# ───────────────────────────────────────────────
+EXPORT_FORMATS = ("xlsx", "parquet", "csv")
+
+# Same look as DataFrame.to_excel's header row
+HEADER_FMT   = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+CURRENCY_FMT = {"num_format": "#,##0.00"}
+PERCENT_FMT  = {"num_format": "0.00%"}
+
+
+def gm_pct_pivot(gm_df):
+    """Pivot: average GM % by project, best first."""
+    pivot = rollup_frame(gm_df, "Project", pct="Gross Margin %")
+    return (
+        pivot[["Project", "Mean GM %"]]
+        .rename(columns={"Mean GM %": "Gross Margin %"})
+        .dropna(subset=["Gross Margin %"])
+        .sort_values("Gross Margin %", ascending=False)
+    )
+
+
+# Rows boxed to Python objects at a time while writing, so export memory stays flat
+CHUNK_ROWS = 10_000
+
+
+def _rows(df):
+    """Row tuples with NaN as None (written as a blank cell), ``CHUNK_ROWS`` at a time."""
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        yield from chunk.astype(object).where(chunk.notna(), None).itertuples(index=False,
+                                                                                 name=None)
+
+
+def _write_table(ws, df, header_fmt):
+    """Header + data rows in order, as constant_memory mode requires."""
+    ws.write_row(0, 0, list(df.columns), header_fmt)
+    for r, row in enumerate(_rows(df), start=1):
+        ws.write_row(r, 0, row)
+
+
+# ───────────────────────────────────────────────
+# Ranking sheets  (one table + chart per view, see faas_rank.py)
+# ───────────────────────────────────────────────
+MONEY_COLUMNS = ("Revenue", "Cost", "Direct Expense", "Gross Margin")
+
+CHART_ROWS = 15          # rows a default-height chart covers
+BLOCK_GAP  = 2           # blank rows between Ownership blocks
+MAX_BLOCK_CHARTS = 50    # per sheet; further Ownership blocks get a table only
+
+
+def _rank_chart(wb, sheet, title, metric_col, project_col, first, last, num_format=None):
+    chart = wb.add_chart({"type": "column"})
+    chart.add_series({
+        "name":       title,
+        "categories": [sheet, first, project_col, last, project_col],
+        "values":     [sheet, first, metric_col, last, metric_col],
+    })
+    chart.set_title({"name": title})
+    chart.set_x_axis({"num_font": {"rotation": -45}})
+    if num_format:
+        chart.set_y_axis({"num_format": num_format})
+    chart.set_legend({"none": True})
+    return chart
+
+
+def _write_rank_view(wb, view, header_fmt, title_fmt, cur_fmt, pct_fmt):
+    """Table(s) and chart(s) for one view; layout follows the row counts."""
+    ws = wb.add_worksheet(view.sheet)
+    frame = view.frame
+    cols = list(frame.columns)
+    for i, col in enumerate(cols):
+        if col in MONEY_COLUMNS:
+            ws.set_column(i, i, 14, cur_fmt)
+        elif col == "Gross Margin %":
+            ws.set_column(i, i, 16, pct_fmt)
+        elif col in ("Project", "Ownership"):
+            ws.set_column(i, i, 25)
+    metric_col, project_col = cols.index(view.metric), cols.index("Project")
+    num_format = "0%" if view.metric == "Gross Margin %" else None
+    chart_at = len(cols) + 1                          # one blank column after the table
+    chart_opts = {"x_scale": 1.5, "x_offset": 10, "y_offset": 10}
+
+    if not view.by_ownership:
+        _write_table(ws, frame, header_fmt)
+        if len(frame):
+            ws.insert_chart(1, chart_at, _rank_chart(wb, view.sheet, view.title, metric_col,
+                                                     project_col, 1, len(frame), num_format),
+                            chart_opts)
+        return len(frame)
+
+    # One block per Ownership: title row, header, ranked rows; chart beside it
+    ws.write_row(0, 0, [f"{view.title} within each Ownership"], title_fmt)
+    row, block = 2, 0
+    owners = frame["Ownership"].to_numpy()
+    starts = [i for i in range(len(frame)) if i == 0 or owners[i] != owners[i - 1]]
+    for lo, hi in zip(starts, starts[1:] + [len(frame)]):
+        ws.write_row(row, 0, [f"Ownership: {owners[lo]}"], title_fmt)
+        ws.write_row(row + 1, 0, cols, header_fmt)
+        for r, values in enumerate(_rows(frame.iloc[lo:hi]), start=row + 2):
+            ws.write_row(r, 0, values)
+        if block < MAX_BLOCK_CHARTS:
+            ws.insert_chart(row, chart_at, _rank_chart(
+                wb, view.sheet, f"{owners[lo]}: {view.title}",
+                metric_col, project_col, row + 2, row + 1 + hi - lo, num_format), chart_opts)
+        row += max(hi - lo + 2, CHART_ROWS) + BLOCK_GAP
+        block += 1
+    return len(frame)
+
+
+def export_excel(gm_df, output_excel_path, pivot_df=None, rank_views=(), quiet=False,
+                 rejects_df=None):
+    """Write the workbook row by row in xlsxwriter's constant_memory mode.
+
+    ``rank_views`` (from ``faas_rank.ranking_views``) each get their own
+    sheet after the pivot, and ``rejects_df`` (the ledger from
+    ``faas_validate.validate``) a "Rejects" sheet last.  Returns one stats
+    dict per sheet (rows, seconds, RSS change).
+    """
+    os.makedirs(os.path.dirname(output_excel_path) or ".", exist_ok=True)
+    timer = SheetTimer(quiet)
+
+    wb = xlsxwriter.Workbook(output_excel_path, {"constant_memory": True})
+    try:
+        # Formats are built once and shared by both sheets
+        header_fmt = wb.add_format(HEADER_FMT)
+        cur_fmt    = wb.add_format(CURRENCY_FMT)
+        pct_fmt    = wb.add_format(PERCENT_FMT)
+
+        # Main sheet
+        t0 = time.perf_counter()
+        ws = wb.add_worksheet("Gross Margin")
+        #ws.set_column("B:B", 14, cur_fmt)    # Cost
+        #ws.set_column("C:D", 14, cur_fmt)    # Revenue & Direct Expense
+        #ws.set_column("E:E", 16, cur_fmt)    # Gross Margin
+        #ws.set_column("F:F", 16, pct_fmt)    # Gross Margin %
+        ws.set_column("C:C", 14, cur_fmt)  # Cost
+        ws.set_column("D:E", 14, cur_fmt)  # Revenue & Direct Expense
+        ws.set_column("F:F", 16, cur_fmt)  # Gross Margin
+        ws.set_column("G:G", 16, pct_fmt)  # Gross Margin %
+        _write_table(ws, gm_df, header_fmt)
+        timer.record("Gross Margin", len(gm_df), t0, output_excel_path)
+
+        # Pivot: average GM % by project
+        t0 = time.perf_counter()
+        if pivot_df is None:
+            pivot_df = gm_pct_pivot(gm_df)
+        ws_piv = wb.add_worksheet("GM % Pivot")
+        ws_piv.set_column("A:A", 25)
+        ws_piv.set_column("B:B", 16, pct_fmt)
+        _write_table(ws_piv, pivot_df, header_fmt)
+
+        # Column chart for GM % in pivot sheet
+        chart = wb.add_chart({'type': 'column'})
+        max_row = len(pivot_df)
+        chart.add_series({
+            'name':       'Gross Margin %',
+            'categories': ['GM % Pivot', 1, 0, max_row, 0],  # Project names
+            'values':     ['GM % Pivot', 1, 1, max_row, 1],  # GM %
+            'data_labels': {'value': False},
+        })
+        chart.set_title({'name': 'Gross Margin % by Project'})
+        chart.set_x_axis({'name': 'Project'})
+        chart.set_y_axis({'name': 'Gross Margin %'})
+        chart.set_legend({'none': True})
+        ws_piv.insert_chart('D2', chart,
+                            {'x_scale': 2.0, 'y_scale': 1.4,
+                             'x_offset': 20, 'y_offset': 10})
+        timer.record("GM % Pivot", len(pivot_df), t0, output_excel_path)
+
+        # Ranking views
+        title_fmt = wb.add_format({"bold": True})
+        for view in rank_views:
+            t0 = time.perf_counter()
+            rows = _write_rank_view(wb, view, header_fmt, title_fmt, cur_fmt, pct_fmt)
+            timer.record(view.sheet, rows, t0, output_excel_path)
+
+        # Reject ledger
+        if rejects_df is not None:
+            t0 = time.perf_counter()
+            ws_rej = wb.add_worksheet("Rejects")
+            ws_rej.set_column("A:A", 16)
+            ws_rej.set_column("C:E", 25)
+            _write_table(ws_rej, rejects_df, header_fmt)
+            timer.record("Rejects", len(rejects_df), t0, output_excel_path)
+    finally:
+        t0 = time.perf_counter()
+        wb.close()                           # zips the temp sheet files
+        timer.record("(workbook close)", 0, t0, output_excel_path)
+    return timer.stats
+
+
+def _file_suffix(sheet):
+    return "_".join("".join(c if c.isalnum() else " " for c in sheet.replace("%", "Pct")).split())
+
+
+def export_tables(gm_df, output_excel_path, fmt="xlsx", pivot_df=None, rank_views=(),
+                  rejects_df=None):
+    """Export the same sheets as .xlsx, or one Parquet/CSV file per sheet.
+
+    Parquet/CSV files sit next to ``output_excel_path``:
+    ``<stem>_Gross_Margin.<ext>``, ``<stem>_GM_Pct_Pivot.<ext>``, one
+    ``<stem>_<view sheet>.<ext>`` per ranking view (e.g. ``_Top_10_GM_Pct``)
+    and ``<stem>_Rejects.<ext>``.
+    """
+    if fmt == "xlsx":
+        return export_excel(gm_df, output_excel_path, pivot_df, rank_views,
+                            rejects_df=rejects_df)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+
+    stem = os.path.splitext(output_excel_path)[0]
+    os.makedirs(os.path.dirname(stem) or ".", exist_ok=True)
+    timer = SheetTimer()
+    tables = [("Gross Margin", "Gross_Margin", lambda: gm_df),
+              ("GM % Pivot",   "GM_Pct_Pivot",
+               lambda: gm_pct_pivot(gm_df) if pivot_df is None else pivot_df)]
+    tables += [(v.sheet, _file_suffix(v.sheet), lambda v=v: v.frame) for v in rank_views]
+    if rejects_df is not None:
+        tables.append(("Rejects", "Rejects", lambda: rejects_df))
+    for sheet, suffix, make in tables:
+        t0 = time.perf_counter()
+        df = make()
+        path = f"{stem}_{suffix}.{fmt}"
+        if fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        timer.record(sheet, len(df), t0, path)
+    return timer.stats
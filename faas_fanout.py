@@ -0,0 +1,215 @@
+"""
+Fan-out mode: one Gross Margin workbook + dashboard per Ownership.
+
+gm_df is computed once and sorted by Ownership, so each owner is a
+contiguous row range.  The sorted frame is handed to every worker process
+once (through a pickle file read by the pool initializer); a task is just
+``(owner, first row, last row)`` and the worker slices its view out of the
+frame it already holds.  Workers also import matplotlib once, and the
+xlsxwriter format specs are shared module constants (faas_export.py).  A
+JSON manifest of every file written, with timings, closes the run.
+
+    python faas_fanout.py "D:/.../FAAS/New/FAAS Working File.xlsx" --out D:/.../By_Ownership
+    python faas_fanout.py workbook.xlsx --out out --workers 8 --no-png
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from faas_dashboard import DEFAULT_DPI, render_dashboard
+from faas_export import export_excel
+from faas_rank import DEFAULT_TOP_N, ranking_views
+
+OUTPUT_XLSX = "Gross_Margin_Output.xlsx"
+OUTPUT_PNG  = "Gross_Margin_Dashboard.png"
+MANIFEST    = "Gross_Margin_Fanout_Manifest.json"
+NO_OWNER    = "(none)"
+
+
+# ───────────────────────────────────────────────
+# Partitioning
+# ───────────────────────────────────────────────
+def partition_by_owner(gm_df):
+    """(gm_df sorted by Ownership, [(owner, lo, hi)]) — each owner is rows lo:hi."""
+    owners = gm_df["Ownership"].fillna(NO_OWNER)
+    codes, uniques = pd.factorize(owners, sort=True)
+    order = np.argsort(codes, kind="stable")          # keeps sheet order within an owner
+    bounds = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(uniques)))]
+    parts = [(str(owner), int(lo), int(hi))
+             for owner, lo, hi in zip(uniques, bounds[:-1], bounds[1:])]
+    return gm_df.take(order).reset_index(drop=True), parts
+
+
+def owner_dirs(owners):
+    """File-system-safe, unique folder name per owner."""
+    dirs, used = {}, set()
+    for owner in owners:
+        slug = "".join(c if c.isalnum() or c in " -_" else "_" for c in owner).strip() or "owner"
+        name, n = slug, 2
+        while name.lower() in used:
+            name, n = f"{slug} ({n})", n + 1
+        used.add(name.lower())
+        dirs[owner] = name
+    return dirs
+
+
+# ───────────────────────────────────────────────
+# Worker process
+# ───────────────────────────────────────────────
+_GM = None          # sorted gm_df, loaded once per worker
+_OPTS = None
+
+
+def _init_worker(data_file, opts):
+    global _GM, _OPTS
+    with open(data_file, "rb") as f:
+        _GM = pickle.load(f)
+    _OPTS = opts
+    if opts["png"]:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401   imported once, reused for every owner
+
+
+def _owner_report(owner, lo, hi, folder):
+    t0 = time.perf_counter()
+    owner_df = _GM.iloc[lo:hi]                         # view of this owner's rows
+    out_dir = os.path.join(_OPTS["out_dir"], folder)
+    xlsx = os.path.join(out_dir, OUTPUT_XLSX)
+    views = ranking_views(owner_df, _OPTS["rank"], by_ownership=False) if _OPTS["rank"] else ()
+    export_excel(owner_df, xlsx, rank_views=views, quiet=True)
+    t1 = time.perf_counter()
+
+    files = [xlsx]
+    png_status = None
+    if _OPTS["png"]:
+        png = os.path.join(out_dir, OUTPUT_PNG)
+        png_status = render_dashboard(owner_df, png, _OPTS["dpi"], _OPTS["png_top"])
+        files.append(png)
+    t2 = time.perf_counter()
+    return {"Ownership": owner, "rows": hi - lo, "files": files, "png": png_status,
+            "xlsx_s": round(t1 - t0, 3), "png_s": round(t2 - t1, 3) if _OPTS["png"] else None,
+            "seconds": round(t2 - t0, 3), "pid": os.getpid()}
+
+
+# ───────────────────────────────────────────────
+# Driver
+# ───────────────────────────────────────────────
+def fan_out(gm_df, out_dir, workers=None, png=True, dpi=DEFAULT_DPI, png_top=None,
+            rank=DEFAULT_TOP_N):
+    """Write every owner's workbook (and PNG) on a process pool; returns the manifest path."""
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    sorted_df, parts = partition_by_owner(gm_df)
+    folders = owner_dirs([owner for owner, _, _ in parts])
+    workers = max(1, min(workers or os.cpu_count() or 1, len(parts) or 1))
+
+    fd, data_file = tempfile.mkstemp(suffix=".pkl", prefix="faas_fanout_")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(sorted_df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    opts = {"out_dir": out_dir, "png": png, "dpi": dpi, "png_top": png_top, "rank": rank}
+
+    reports, errors = [], []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data_file, opts)) as pool:
+            futures = {pool.submit(_owner_report, owner, lo, hi, folders[owner]): owner
+                       for owner, lo, hi in parts}
+            for fut in as_completed(futures):
+                owner = futures[fut]
+                try:
+                    rep = fut.result()
+                except Exception as exc:      # one owner must not stop the others
+                    errors.append({"Ownership": owner, "error": f"{type(exc).__name__}: {exc}"})
+                    print(f"❌ {owner}: {type(exc).__name__}: {exc}")
+                    continue
+                reports.append(rep)
+                print(f"✅ {owner}: {rep['rows']:,} rows in {rep['seconds']:.2f}s")
+    finally:
+        os.remove(data_file)
+
+    reports.sort(key=lambda r: r["Ownership"])
+    wall = time.perf_counter() - t0
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "out_dir": os.path.abspath(out_dir),
+        "owners": len(parts), "workers": workers,
+        "wall_s": round(wall, 3),
+        "sum_owner_s": round(sum(r["seconds"] for r in reports), 3),
+        "reports": reports, "errors": errors,
+    }
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ {len(reports)} owner reports on {workers} workers in {wall:.1f}s → {path}")
+    return path
+
+
+def fan_out_isolated(gm_df, out_dir, png=True, dpi=DEFAULT_DPI, png_top=None,
+                     rank=DEFAULT_TOP_N, workers=None):
+    """``fan_out`` via ``python faas_fanout.py``, for callers that are not
+    import-safe under spawn (the main script); returns the manifest path."""
+    fd, gm_file = tempfile.mkstemp(suffix=".pkl", prefix="faas_gm_")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(gm_df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    cmd = [sys.executable, os.path.abspath(__file__), "--gm-pickle", gm_file, "--out", out_dir,
+           "--dpi", str(dpi), "--rank", str(rank)]
+    if not png:
+        cmd.append("--no-png")
+    if png_top:
+        cmd += ["--png-top", str(png_top)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    try:
+        subprocess.run(cmd, check=True)
+    finally:
+        os.remove(gm_file)
+    return os.path.join(out_dir, MANIFEST)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="One Gross Margin report per Ownership")
+    parser.add_argument("workbook", nargs="?", help="FAAS Working File .xlsx")
+    parser.add_argument("--gm-pickle", default=None, help=argparse.SUPPRESS)   # from FAAS Output.py
+    parser.add_argument("--out", required=True, help="output root; one folder per owner")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--no-png", action="store_true")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--png-top", type=int, default=None, metavar="N")
+    parser.add_argument("--rank", type=int, default=DEFAULT_TOP_N, metavar="N",
+                        help="top/bottom N sheets per workbook (0 = none)")
+    args = parser.parse_args(argv)
+
+    if args.gm_pickle:
+        with open(args.gm_pickle, "rb") as f:
+            gm_df = pickle.load(f)
+    elif args.workbook:
+        from faas_margin import compute_gross_margin
+        from faas_sheets import group_revenue, read_sheets
+        from faas_validate import ledger_summary, validate, write_ledger
+        employee_df, client_df, direct_df, rejects_df = validate(
+            *read_sheets(args.workbook, group_client=False))
+        gm_df = compute_gross_margin(employee_df, group_revenue(client_df), direct_df)
+        # One ledger for the whole workbook (Employee rows have no Ownership)
+        path = write_ledger(rejects_df, os.path.join(args.out, OUTPUT_XLSX))
+        print(f"{'✅' if rejects_df.empty else '⚠️'} Validation: {ledger_summary(rejects_df)} → {path}")
+    else:
+        parser.error("a workbook (or --gm-pickle) is required")
+
+    fan_out(gm_df, args.out, args.workers, png=not args.no_png, dpi=args.dpi,
+            png_top=args.png_top, rank=args.rank)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
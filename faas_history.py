@@ -0,0 +1,257 @@
+"""
+Historical Gross Margin store: every run's gm_df, one partition per period.
+
+    <root>/projects.json, owners.json      append-only key dictionaries
+    <root>/period=2024-05/project.npy      int32 codes into projects.json
+                          ownership.npy    int32 codes (-1 = none)
+                          revenue.npy …    float64, one file per measure
+                          meta.json        rows, workbook, written_at
+
+Columns are plain ``.npy`` files, opened memory-mapped, so a query only
+touches the partitions in its period range and the columns its measure
+needs.  Re-running a period replaces its partition.
+
+    store = HistoryStore(r"D:/.../FAAS/History")
+    store.append("2024-05", gm_df)
+    store.trend("Gross Margin %", level="project", keys=["Proj 7"])
+    month_over_month(store.trend("Revenue", level="ownership"))
+
+gm_df repeats a project's Cost and Direct Expense on each of its Ownership
+rows, so trends split them across the owners with the cube's allocation
+rule (faas_cube.py) before summing: a project's totals count its cost once,
+and per-owner trends agree with ``Cube.view``.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from faas_cube import COST_ALLOCATION, allocation_shares
+from faas_engine import gross_margin, gross_margin_pct
+
+PERIOD_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+# gm_df column → file stem
+COLUMNS = {
+    "Project":        "project",
+    "Ownership":      "ownership",
+    "Revenue":        "revenue",
+    "Cost":           "cost",
+    "Direct Expense": "direct_expense",
+    "Gross Margin":   "gross_margin",
+    "Gross Margin %": "gm_pct",
+}
+KEY_COLUMNS = {"project": "Project", "ownership": "Ownership"}
+
+# Measures a trend sums (Cost / Direct Expense allocated); GM and GM % are derived from the sums
+TREND_MEASURES = ["Revenue", "Cost", "Direct Expense", "Gross Margin", "Gross Margin %"]
+_ALLOCATED = {"Cost": "cost", "Direct Expense": "direct_expense"}
+
+
+def period_arg(value):
+    """argparse ``type=`` for a YYYY-MM period, so a bad one fails before the run."""
+    if not PERIOD_RE.match(value):
+        raise argparse.ArgumentTypeError(f"must look like YYYY-MM, got {value!r}")
+    return value
+
+
+def _write_json(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+
+class KeyLog:
+    """Append-only dictionary: a key keeps its code for the life of the store."""
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.keys = json.load(f)
+        self.index = {k: i for i, k in enumerate(self.keys)}
+
+    def encode(self, values):
+        """int32 codes for ``values``, adding unseen keys; missing → -1."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, key in enumerate(uniques):
+            key = str(key)
+            if key not in self.index:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+            lookup[i] = self.index[key]
+        lookup[-1] = -1
+        return lookup[codes]
+
+    def codes_of(self, keys):
+        return np.array([self.index.get(str(k), -1) for k in keys], dtype=np.int64)
+
+    def save(self):
+        _write_json(self.path, self.keys)
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.projects = KeyLog(os.path.join(root, "projects.json"))
+        self.owners   = KeyLog(os.path.join(root, "owners.json"))
+        self._maps = {}                 # (period, stem) → open memmap, reused across queries
+        self._shares = {}               # (period, rule) → allocation share per row
+
+    # Layout ───────────────────────────────────────
+    def _partition(self, period):
+        return os.path.join(self.root, f"period={period}")
+
+    def periods(self, start=None, end=None):
+        """Stored periods in order, optionally limited to ``start``..``end`` (inclusive)."""
+        found = sorted(name[len("period="):] for name in os.listdir(self.root)
+                       if name.startswith("period="))
+        return [p for p in found if (start is None or p >= start) and (end is None or p <= end)]
+
+    # Writing ──────────────────────────────────────
+    def append(self, period, gm_df, workbook=None):
+        """Store ``gm_df`` as ``period`` (YYYY-MM), replacing an earlier run of it."""
+        if not PERIOD_RE.match(period):
+            raise ValueError(f"Period must look like YYYY-MM, got {period!r}")
+        columns = {
+            "project":   self.projects.encode(gm_df["Project"]),
+            "ownership": self.owners.encode(gm_df["Ownership"]),
+        }
+        for col, stem in COLUMNS.items():
+            if stem not in columns:
+                columns[stem] = gm_df[col].to_numpy(dtype=np.float64)
+        self.projects.save()
+        self.owners.save()
+
+        # Write beside the store, then swap in, so readers never see half a partition
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        for stem, values in columns.items():
+            np.save(os.path.join(tmp, f"{stem}.npy"), values)
+        _write_json(os.path.join(tmp, "meta.json"), {
+            "period": period, "rows": len(gm_df), "workbook": workbook,
+            "written_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        final = self._partition(period)
+        self._maps = {k: v for k, v in self._maps.items() if k[0] != period}
+        self._shares = {k: v for k, v in self._shares.items() if k[0] != period}
+        if os.path.exists(final):
+            old = final + ".old"
+            os.replace(final, old)
+            os.replace(tmp, final)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, final)
+        return final
+
+    # Reading ──────────────────────────────────────
+    def _column(self, period, stem):
+        arr = self._maps.get((period, stem))
+        if arr is None:
+            arr = np.load(os.path.join(self._partition(period), f"{stem}.npy"), mmap_mode="r")
+            self._maps[period, stem] = arr
+        return arr
+
+    def _share(self, period, rule):
+        share = self._shares.get((period, rule))
+        if share is None:
+            share = allocation_shares(np.asarray(self._column(period, "project")),
+                                      np.asarray(self._column(period, "revenue")), rule)
+            self._shares[period, rule] = share
+        return share
+
+    def _measure(self, period, measure, rule):
+        """Row values of ``measure`` that add up correctly per project and per owner."""
+        if measure == "Revenue":
+            return self._column(period, "revenue")
+        if measure in _ALLOCATED:
+            return self._column(period, _ALLOCATED[measure]) * self._share(period, rule)
+        share = self._share(period, rule)           # Gross Margin on the allocated cost
+        return gross_margin(self._column(period, "revenue"),
+                            self._column(period, "cost") * share,
+                            self._column(period, "direct_expense") * share)
+
+    def read(self, period):
+        """gm_df of one stored period."""
+        frame = {col: self._column(period, stem) for col, stem in COLUMNS.items()}
+        projects = pd.Index(self.projects.keys, dtype=object)
+        owners   = pd.Index(self.owners.keys, dtype=object)
+        frame["Project"] = projects.take(np.asarray(frame["Project"]))
+        frame["Ownership"] = owners.take(np.asarray(frame["Ownership"]),
+                                         allow_fill=True, fill_value=np.nan)
+        return pd.DataFrame(frame)
+
+    def trend(self, measure="Gross Margin %", level="project", keys=None, start=None, end=None,
+              rule=COST_ALLOCATION):
+        """One row per period, one column per Project (or Ownership).
+
+        Revenue is summed over the gm_df rows of each key; Cost and Direct
+        Expense are first split across each project's owners by ``rule``, so
+        a project counts its cost once.  "Gross Margin %" is sum(GM) /
+        sum(Revenue).  Keys absent from a period are NaN.  Only the partitions
+        in ``start``..``end`` and the columns the measure needs are read.
+        """
+        if measure not in TREND_MEASURES:
+            raise ValueError(f"Unknown measure {measure!r}; expected one of {TREND_MEASURES}")
+        key_stem = level if level in KEY_COLUMNS else None
+        if key_stem is None:
+            raise ValueError(f"level must be one of {tuple(KEY_COLUMNS)}")
+        log = self.projects if key_stem == "project" else self.owners
+        periods = self.periods(start, end)
+
+        # Dictionary code → output column (-1 = not asked for)
+        if keys is None:
+            names = list(log.keys)
+            lookup = np.arange(len(names), dtype=np.int64)
+        else:
+            names = list(keys)
+            lookup = np.full(len(log.keys), -1, dtype=np.int64)
+            codes = log.codes_of(names)
+            lookup[codes[codes >= 0]] = np.flatnonzero(codes >= 0)
+        lookup = np.append(lookup, -1)                     # code -1 (no owner) → dropped
+        K = len(names)
+
+        summed = ["Gross Margin", "Revenue"] if measure == "Gross Margin %" else [measure]
+        sums = {m: np.zeros((len(periods), K)) for m in summed}
+        seen = np.zeros((len(periods), K), dtype=bool)
+        for p, period in enumerate(periods):
+            col = lookup[np.asarray(self._column(period, key_stem))]
+            mask = col >= 0
+            col = col[mask]
+            seen[p] = np.bincount(col, minlength=K) > 0
+            for m in summed:
+                sums[m][p] = np.bincount(col, weights=self._measure(period, m, rule)[mask],
+                                         minlength=K)
+
+        if measure == "Gross Margin %":
+            values = gross_margin_pct(sums["Gross Margin"], sums["Revenue"])
+        else:
+            values = sums[measure]
+        values[~seen] = np.nan
+        out = pd.DataFrame(values, index=pd.Index(periods, name="Period"), columns=names)
+        out.columns.name = KEY_COLUMNS[key_stem]
+        return out
+
+
+# ───────────────────────────────────────────────
+# Trend helpers  (work on any ``trend`` frame)
+# ───────────────────────────────────────────────
+def moving_average(trend_df, window=3):
+    """Trailing ``window``-period mean; the first periods use what is available."""
+    return trend_df.rolling(window, min_periods=1).mean()
+
+
+def month_over_month(trend_df, pct=False):
+    """Change from the previous stored period (relative change with ``pct``)."""
+    if pct:
+        return trend_df.pct_change(fill_method=None)
+    return trend_df.diff()
@@ -0,0 +1,155 @@
+"""
+Incremental Gross Margin recompute.
+
+The previous run's gm_df is kept on disk together with a digest of every
+row that feeds it.  On the next run each project gets an order-sensitive
+signature per sheet; only projects whose signature changed (rows inserted,
+deleted, edited or reordered) are re-aggregated, re-merged and spliced back
+into the previous gm_df.  Sums for a project are taken over the same rows in
+the same order as a full run, so the result is identical to a full recompute.
+"""
+import hashlib
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from faas_margin import compute_gross_margin
+
+# Bump when the digest layout or the margin maths change
+STATE_VERSION = 1
+
+# Columns of each cleaned frame that feed gm_df
+DIGEST_COLUMNS = {
+    "employee": ["Project", "Salary", "Involvement", "Cost"],
+    "client":   ["Project", "Ownership", "Revenue"],
+    "direct":   ["Project", "Direct Expense"],
+}
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ───────────────────────────────────────────────
+# Row digests & project signatures
+# ───────────────────────────────────────────────
+def row_digests(df, cols):
+    """(uint64 digest per row, Project per row) for rows with a Project."""
+    sub = df.loc[df["Project"].notna(), cols]
+    return pd.util.hash_pandas_object(sub, index=False).to_numpy(), sub["Project"]
+
+
+def project_signatures(digests, projects):
+    """XOR per project of each row digest mixed with its position in the project."""
+    if len(digests) == 0:
+        return pd.Series(dtype="uint64")
+    codes, uniques = pd.factorize(projects)
+    ordinal = projects.groupby(codes, sort=False).cumcount().to_numpy().astype("uint64")
+    mixed = pd.util.hash_array(digests ^ (ordinal * _GOLDEN))
+
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sig = np.bitwise_xor.reduceat(mixed[order], starts)
+    return pd.Series(sig, index=pd.Index(uniques)[sorted_codes[starts]])
+
+
+def changed_projects(old_sig, new_sig):
+    """Projects added, removed or whose signature differs."""
+    both = old_sig.index.intersection(new_sig.index)
+    differ = both[old_sig.loc[both].to_numpy() != new_sig.loc[both].to_numpy()]
+    return set(differ) | set(old_sig.index.difference(new_sig.index)) \
+                       | set(new_sig.index.difference(old_sig.index))
+
+
+def row_changes(old_digests, new_digests):
+    """(rows added, rows removed) as multisets of digests; an edit counts as one of each."""
+    old_vc = pd.Series(old_digests).value_counts()
+    new_vc = pd.Series(new_digests).value_counts()
+    diff = new_vc.sub(old_vc, fill_value=0)
+    return int(diff[diff > 0].sum()), int(-diff[diff < 0].sum())
+
+
+# ───────────────────────────────────────────────
+# State file
+# ───────────────────────────────────────────────
+def state_path(state_dir, workbook):
+    tag = hashlib.sha256(os.path.abspath(workbook).encode()).hexdigest()[:16]
+    return os.path.join(state_dir, f"incremental-{tag}.pkl")
+
+
+def load_state(path):
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# ───────────────────────────────────────────────
+# Public entry point
+# ───────────────────────────────────────────────
+def incremental_gross_margin(workbook, employee_df, client_df, direct_df, state_dir):
+    """gm_df for the cleaned sheets, recomputing only projects that changed."""
+    frames = {"employee": employee_df, "client": client_df, "direct": direct_df}
+    path  = state_path(state_dir, workbook)
+    state = load_state(path)
+
+    # Hashing every row is part of the incremental cost, so the clock starts here
+    t0 = time.perf_counter()
+    sheets = {}
+    for name, df in frames.items():
+        digests, projects = row_digests(df, DIGEST_COLUMNS[name])
+        sheets[name] = {"digests": digests,
+                        "sig":     project_signatures(digests, projects)}
+    digest_s = time.perf_counter() - t0
+
+    if state is None:
+        t0 = time.perf_counter()
+        gm_df = compute_gross_margin(employee_df, client_df, direct_df)
+        full_s = time.perf_counter() - t0
+        print(f"✅ Full rebuild of {gm_df['Project'].nunique()} projects in {full_s:.3f}s "
+              f"(no previous state)")
+        save_state(path, {"version": STATE_VERSION, "gm_df": gm_df,
+                          "sheets": sheets, "full_seconds": full_s})
+        return gm_df
+
+    touched, added, removed = set(), 0, 0
+    for name, new in sheets.items():
+        old = state["sheets"][name]
+        touched |= changed_projects(old["sig"], new["sig"])
+        a, r = row_changes(old["digests"], new["digests"])
+        added, removed = added + a, removed + r
+
+    prev = state["gm_df"]
+    if touched:
+        keys  = list(touched)
+        delta = compute_gross_margin(employee_df[employee_df["Project"].isin(keys)],
+                                     client_df[client_df["Project"].isin(keys)],
+                                     direct_df[direct_df["Project"].isin(keys)])
+        gm_df = (
+            pd.concat([prev[~prev["Project"].isin(keys)], delta], ignore_index=True)
+            .sort_values("Project", kind="stable")
+            .reset_index(drop=True)
+        )
+    else:
+        gm_df = prev.copy()
+    delta_s = time.perf_counter() - t0
+
+    n_projects = gm_df["Project"].nunique()
+    print(f"✅ Incremental recompute: {len(touched)}/{n_projects} projects touched "
+          f"(+{added}/-{removed} rows) in {delta_s:.3f}s, {digest_s:.3f}s of it hashing rows, "
+          f"vs {state['full_seconds']:.3f}s for the last full rebuild")
+    save_state(path, {"version": STATE_VERSION, "gm_df": gm_df,
+                      "sheets": sheets, "full_seconds": state["full_seconds"]})
+    return gm_df
@@ -0,0 +1,200 @@
+"""
+Stage instrumentation for production runs.
+
+``RunReport.stage`` wraps a pipeline stage and records wall time, CPU time,
+memory and row counts in/out.  Memory per stage is the change in RSS across
+the stage (``rss_delta_mb``) next to the process's high-water mark so far
+(``process_peak_rss_mb``, which never goes down, so it is not per stage).
+With ``trace_memory`` each stage also gets ``stage_peak_mb``: the most
+memory it held above what was allocated when it started, from
+``tracemalloc`` (Python and NumPy allocations; tracing slows reading
+roughly 3x, so it is off by default).  The report is written as JSON next to the
+outputs.  With profiling on, every stage runs under its own cProfile and the
+profile of the slowest stage is kept (``.prof`` file plus the top entries in
+the report).  Stages slower than their threshold raise a ``SlowStageWarning``.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+REPORT_NAME = "Gross_Margin_Run_Report.json"
+
+# Seconds before a stage is reported as slow; matched on the stage name prefix
+SLOW_STAGE_SECONDS = {
+    "2.": 120.0,      # read & clean (per sheet)
+    "3.": 30.0,       # aggregate
+    "4.": 30.0,       # merge
+    "5.": 30.0,       # gross margin
+    "6.": 120.0,      # pivot + export
+    "7.": 120.0,      # png
+}
+
+
+class SlowStageWarning(UserWarning):
+    pass
+
+
+warnings.simplefilter("always", SlowStageWarning)
+
+
+def peak_rss_mb():
+    """High-water resident memory of this process so far in MB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+    except ImportError:                       # Windows
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+    except ImportError:
+        return None
+
+
+def rss_mb():
+    """Current resident memory of this process in MB, or None if unavailable."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:             # Linux without psutil
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _mb(value):
+    return None if value is None else round(value, 1)
+
+
+def _rows(obj):
+    if obj is None:
+        return None
+    if isinstance(obj, (tuple, list)):
+        return sum(len(o) for o in obj)
+    return len(obj)
+
+
+class StageRecord(dict):
+    """One stage's measurements; set ``rows_out`` with ``out()``."""
+
+    def out(self, result):
+        self["rows_out"] = _rows(result)
+        return result
+
+
+class RunReport:
+    def __init__(self, workbook, profile=False, thresholds=None, slow_seconds=None,
+                 trace_memory=False):
+        self.workbook = workbook
+        self.profile = profile
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.thresholds = dict(SLOW_STAGE_SECONDS if thresholds is None else thresholds)
+        self.slow_seconds = slow_seconds           # one threshold for every stage
+        self.started = datetime.now()
+        self.t0 = time.perf_counter()
+        self.stages = []
+        self.warnings = []
+        self._profiles = {}
+
+    # Recording ────────────────────────────────────
+    def _threshold(self, name):
+        if self.slow_seconds is not None:
+            return self.slow_seconds
+        for prefix, seconds in self.thresholds.items():
+            if name.startswith(prefix):
+                return seconds
+        return None
+
+    def _finish(self, rec):
+        self.stages.append(rec)
+        limit = self._threshold(rec["stage"])
+        if limit is not None and rec["wall_s"] > limit:
+            msg = f"Stage {rec['stage']!r} took {rec['wall_s']:.1f}s (threshold {limit:g}s)"
+            self.warnings.append(msg)
+            warnings.warn(msg, SlowStageWarning, stacklevel=3)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        rec = StageRecord(stage=name, rows_in=_rows(rows_in), rows_out=None)
+        prof = cProfile.Profile() if self.profile else None
+        rss0 = rss_mb()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced0 = tracemalloc.get_traced_memory()[0]
+        t0, c0 = time.perf_counter(), time.process_time()
+        if prof:
+            prof.enable()
+        try:
+            yield rec
+        finally:
+            if prof:
+                prof.disable()
+                self._profiles[name] = prof
+            rss1 = rss_mb()
+            rec.update(wall_s=round(time.perf_counter() - t0, 4),
+                       cpu_s=round(time.process_time() - c0, 4),
+                       rss_delta_mb=None if rss0 is None or rss1 is None else round(rss1 - rss0, 1),
+                       process_peak_rss_mb=_mb(peak_rss_mb()))
+            if self.trace_memory:
+                rec["stage_peak_mb"] = _mb((tracemalloc.get_traced_memory()[1] - traced0) / 2**20)
+            self._finish(rec)
+
+    def add(self, name, wall_s, rows_in=None, rows_out=None, **extra):
+        """Record a stage timed elsewhere (e.g. a background worker; no memory of its own)."""
+        self._finish(StageRecord(stage=name, rows_in=rows_in, rows_out=rows_out,
+                                 wall_s=round(wall_s, 4), cpu_s=None, rss_delta_mb=None,
+                                 process_peak_rss_mb=_mb(peak_rss_mb()), **extra))
+
+    # Output ───────────────────────────────────────
+    def _slowest_profile(self, out_dir):
+        timed = [s for s in self.stages if s["stage"] in self._profiles]
+        if not timed:
+            return None
+        slowest = max(timed, key=lambda s: s["wall_s"])["stage"]
+        prof = self._profiles[slowest]
+        path = os.path.join(out_dir, "Gross_Margin_Slowest_Stage.prof")
+        prof.dump_stats(path)
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(25)
+        return {"stage": slowest, "file": path, "top": buf.getvalue().splitlines()}
+
+    def write(self, out_dir, **meta):
+        """Write the JSON report into ``out_dir`` and return its path."""
+        os.makedirs(out_dir, exist_ok=True)
+        report = {
+            "started_at": self.started.isoformat(timespec="seconds"),
+            "workbook": self.workbook,
+            "total_wall_s": round(time.perf_counter() - self.t0, 4),
+            **meta,
+            "stages": self.stages,
+            "slow_stages": self.warnings,
+            "profile": self._slowest_profile(out_dir) if self.profile else None,
+        }
+        path = os.path.join(out_dir, REPORT_NAME)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
+
+    def summary(self):
+        lines = [f"   {s['stage']:<30} {s['wall_s']:>8.3f}s" for s in self.stages]
+        return "\n".join(lines)
+
+
+def maybe_stage(report, name, rows_in=None):
+    """``report.stage(...)`` or a no-op when there is no report."""
+    return report.stage(name, rows_in) if report is not None else nullcontext(StageRecord())
@@ -0,0 +1,73 @@
+"""
+Aggregate → merge → Gross Margin steps (3-5) of ``FAAS Output.py``.
+"""
+import pandas as pd
+
+from faas_engine import gross_margin, margin
+
+
+# ───────────────────────────────────────────────
+# 3.  AGGREGATE COST & EXPENSE PER PROJECT
+# ───────────────────────────────────────────────
+def aggregate_per_project(employee_df, direct_df):
+    project_costs    = employee_df.groupby("Project", as_index=False)["Cost"].sum()
+    project_expenses = direct_df.groupby("Project",  as_index=False)["Direct Expense"].sum()
+    return project_costs, project_expenses
+
+
+# ───────────────────────────────────────────────
+# 4.  MERGE EVERYTHING  (full outer keeps all projects)
+# ───────────────────────────────────────────────
+def merge_all(client_df, project_costs, project_expenses, keep_int=False):
+    #gm_df = (
+        #project_costs
+        #.merge(client_df,  on="Project", how="outer")
+        #.merge(project_expenses, on="Project", how="outer")
+    #)
+    gm_df = (
+        client_df
+        .merge(project_costs, on="Project", how="outer")
+        .merge(project_expenses, on="Project", how="outer")
+    )
+
+    # Fill blanks with zero
+    for col in ["Cost", "Revenue", "Direct Expense"]:
+        gm_df[col] = pd.to_numeric(gm_df[col], errors="coerce").fillna(0)
+        if keep_int:                    # fixed-point money stays integer
+            gm_df[col] = gm_df[col].astype("int64")
+    return gm_df
+
+
+# ───────────────────────────────────────────────
+# 5.  CALCULATE GROSS MARGIN
+# ───────────────────────────────────────────────
+def add_gross_margin(gm_df):
+    # Zero revenue → blank GM %
+    gm, pct = margin(gm_df["Revenue"].to_numpy(), gm_df["Cost"].to_numpy(),
+                     gm_df["Direct Expense"].to_numpy(), decimals=2)
+    gm_df["Gross Margin"]   = gm
+    gm_df["Gross Margin %"] = pct
+    return gm_df
+
+
+# ───────────────────────────────────────────────
+# Totals  (a project's Cost / Direct Expense sit on each of its Ownership rows)
+# ───────────────────────────────────────────────
+def project_totals(gm_df):
+    """One row per project: Revenue over its owners, Cost and Direct Expense once."""
+    per = gm_df.groupby("Project", sort=True).agg(
+        {"Revenue": "sum", "Cost": "first", "Direct Expense": "first"})
+    per["Gross Margin"] = gross_margin(per["Revenue"].to_numpy(), per["Cost"].to_numpy(),
+                                       per["Direct Expense"].to_numpy())
+    return per
+
+
+def gm_totals(gm_df):
+    """Revenue, Cost, Direct Expense and Gross Margin over the whole of gm_df."""
+    return project_totals(gm_df).sum()
+
+
+def compute_gross_margin(employee_df, client_df, direct_df):
+    """Steps 3-5 from cleaned sheets to gm_df."""
+    project_costs, project_expenses = aggregate_per_project(employee_df, direct_df)
+    return add_gross_margin(merge_all(client_df, project_costs, project_expenses))
@@ -0,0 +1,96 @@
+"""
+Fixed-point money: amounts held as int64 minor units (paise / cents).
+
+Workbook amounts are rounded to the nearest minor unit once, on the way in
+(half away from zero, judged on the value as typed so binary noise such as
+1.005 → 1.00499… does not flip it).  Salary x Involvement is rounded per
+Employee row with ``COST_ROUNDING``.  Everything after that — per-project
+sums, the outer merge and Gross Margin — is integer arithmetic, so totals
+are exact and reconcile with a ledger kept in minor units.  Amounts only
+become display units (floats) in ``to_display``, right before export.
+"""
+import math
+from decimal import Decimal
+
+import numpy as np
+
+from faas_margin import project_totals
+
+MONEY_SCALE   = 100             # minor units per currency unit (paise per ₹), a power of ten
+COST_ROUNDING = "half_even"     # "half_even" | "half_up" | "down"
+
+MONEY_COLUMNS = ["Revenue", "Cost", "Direct Expense", "Gross Margin"]
+
+# Largest magnitude a float64 carries without losing whole minor units
+_MAX_EXACT = 2.0 ** 53
+
+
+def _round(x, rule):
+    if rule == "half_even":
+        return np.rint(x)
+    if rule == "half_up":                       # half away from zero
+        return np.copysign(np.floor(np.abs(x) + 0.5), x)
+    if rule == "down":                          # toward zero
+        return np.trunc(x)
+    raise ValueError(f"Unknown rounding rule {rule!r}")
+
+
+def _to_int(x):
+    if len(x) and np.abs(x).max() >= _MAX_EXACT:
+        raise OverflowError("Amount too large for fixed-point minor units")
+    return x.astype(np.int64)
+
+
+# ───────────────────────────────────────────────
+# Conversions
+# ───────────────────────────────────────────────
+def to_minor(amounts, scale=MONEY_SCALE):
+    """Amounts in currency units → int64 minor units; missing becomes 0."""
+    x = np.asarray(amounts, dtype=float) * scale
+    x = np.round(np.nan_to_num(x, nan=0.0), 6)          # 100.49999999999999 → 100.5
+    return _to_int(_round(x, "half_up"))
+
+
+def cost_minor(salary_minor, involvement, rounding=COST_ROUNDING):
+    """Salary (minor units) x Involvement, rounded per row with ``rounding``."""
+    x = salary_minor * np.asarray(involvement, dtype=float)
+    return _to_int(_round(np.nan_to_num(x, nan=0.0), rounding))
+
+
+def to_display(gm_df, scale=MONEY_SCALE):
+    """Copy of gm_df with the money columns in currency units, for export."""
+    out = gm_df.copy()
+    for col in MONEY_COLUMNS:
+        if col in out:
+            out[col] = out[col].to_numpy() / scale
+    return out
+
+
+def format_minor(value, scale=MONEY_SCALE):
+    """Exact decimal string for an integer amount in minor units."""
+    return str(Decimal(int(value)).scaleb(-round(math.log10(scale))))
+
+
+# ───────────────────────────────────────────────
+# Sheets
+# ───────────────────────────────────────────────
+def minor_sheets(employee_df, client_df, direct_df, scale=MONEY_SCALE, rounding=COST_ROUNDING):
+    """Copies of the cleaned sheets with Cost / Revenue / Direct Expense in minor units."""
+    employee_df = employee_df.copy()
+    employee_df["Cost"] = cost_minor(to_minor(employee_df["Salary"], scale),
+                                     employee_df["Involvement"], rounding)
+    client_df = client_df.copy()
+    client_df["Revenue"] = to_minor(client_df["Revenue"], scale)
+    direct_df = direct_df.copy()
+    direct_df["Direct Expense"] = to_minor(direct_df["Direct Expense"], scale)
+    return employee_df, client_df, direct_df
+
+
+def money_totals(gm_df, scale=MONEY_SCALE):
+    """Exact totals of an integer gm_df, as decimal strings.
+
+    Summed over the per-project totals, so a project's Cost / Direct Expense
+    (repeated on each of its Ownership rows) counts once, as in the ledger.
+    """
+    per_project = project_totals(gm_df)
+    return {col: format_minor(per_project[col].to_numpy().sum(), scale) for col in MONEY_COLUMNS}
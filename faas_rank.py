@@ -0,0 +1,124 @@
+"""
+Top-N / bottom-N ranking views of gm_df.
+
+Projects are ranked by Gross Margin %, Gross Margin and Revenue over the
+whole sheet, and (Project, Ownership) cells within each Ownership.  gm_df
+repeats a project's Cost and Direct Expense on each of its Ownership rows,
+so the overall views rank ``project_totals`` and the per-Ownership views
+charge each owner its ``COST_ALLOCATION`` share, as the cube does.
+Selection uses ``np.partition`` so only the N chosen rows are ever sorted;
+ties keep row order and rows without a value (e.g. GM % on zero revenue)
+are left out.
+Each view becomes its own sheet with its own chart (see faas_export.py).
+"""
+import numpy as np
+import pandas as pd
+
+from faas_cube import COST_ALLOCATION, NO_OWNER, allocation_shares
+from faas_engine import gross_margin_pct, margin
+from faas_margin import project_totals
+
+# metric key → (gm_df column, short label for sheet names)
+METRICS = {
+    "gm_pct":  ("Gross Margin %", "GM %"),
+    "gm":      ("Gross Margin",   "GM"),
+    "revenue": ("Revenue",        "Revenue"),
+}
+
+DEFAULT_TOP_N = 10
+
+
+# ───────────────────────────────────────────────
+# Partial selection
+# ───────────────────────────────────────────────
+def top_n(values, n, largest=True):
+    """Positions of the ``n`` best non-NaN values, best first; ties keep row order."""
+    v = np.asarray(values, dtype=float)
+    v = v if largest else -v
+    idx = np.flatnonzero(~np.isnan(v))
+    if n < len(idx):
+        kth = np.partition(v[idx], len(idx) - n)[len(idx) - n]      # n-th best value
+        better = idx[v[idx] > kth]
+        ties = idx[v[idx] == kth][:n - len(better)]
+        idx = np.concatenate([better, ties])
+    return idx[np.lexsort((idx, -v[idx]))]
+
+
+def grouped_top_n(values, codes, n, largest=True):
+    """``top_n`` within each group of integer ``codes`` (0..k-1), groups in code order."""
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind="stable")                       # rows grouped, sheet order kept
+    bounds = np.r_[0, np.cumsum(np.bincount(codes))]
+    values = np.asarray(values, dtype=float)[order]
+    picked = [order[lo + top_n(values[lo:hi], n, largest)] for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return np.concatenate(picked) if picked else np.empty(0, dtype=np.int64)
+
+
+# ───────────────────────────────────────────────
+# Views
+# ───────────────────────────────────────────────
+class RankView:
+    """One ranking: ``frame`` holds the rows, ranked, with a leading Rank column."""
+
+    def __init__(self, sheet, title, metric, frame, by_ownership=False):
+        self.sheet, self.title, self.metric = sheet, title, metric
+        self.frame, self.by_ownership = frame, by_ownership
+
+
+def _ranked(frame, rows, ranks):
+    frame = frame.iloc[rows].reset_index(drop=True)
+    frame.insert(0, "Rank", ranks)
+    return frame
+
+
+def project_frame(gm_df):
+    """One row per project (``project_totals``) with its Gross Margin %."""
+    per = project_totals(gm_df).reset_index()
+    per["Gross Margin %"] = gross_margin_pct(per["Gross Margin"].to_numpy(),
+                                             per["Revenue"].to_numpy(), decimals=2)
+    return per
+
+
+def owner_frame(gm_df, rule=COST_ALLOCATION):
+    """gm_df's (Project, Ownership) rows with Cost / Direct Expense allocated by ``rule``."""
+    revenue = gm_df["Revenue"].to_numpy(dtype=float)
+    share = allocation_shares(gm_df["Project"], revenue, rule)
+    cost = gm_df["Cost"].to_numpy(dtype=float) * share
+    expense = gm_df["Direct Expense"].to_numpy(dtype=float) * share
+    gm, pct = margin(revenue, cost, expense, decimals=2)
+    return pd.DataFrame({
+        "Project":        gm_df["Project"].to_numpy(),
+        "Ownership":      gm_df["Ownership"].fillna(NO_OWNER).to_numpy(),
+        "Revenue":        revenue,
+        "Cost":           cost,
+        "Direct Expense": expense,
+        "Gross Margin":   gm,
+        "Gross Margin %": pct,
+    })
+
+
+def ranking_views(gm_df, n=DEFAULT_TOP_N, metrics=tuple(METRICS), by_ownership=True,
+                  rule=COST_ALLOCATION):
+    """Top and bottom ``n`` projects per metric, and (optionally) per Ownership."""
+    projects = project_frame(gm_df)
+    if by_ownership:
+        owners = owner_frame(gm_df, rule)
+        codes, _ = pd.factorize(owners["Ownership"], sort=True)
+    views = []
+    for key in metrics:
+        column, label = METRICS[key]
+        values = projects[column].to_numpy(dtype=float)
+        for largest, side in ((True, "Top"), (False, "Bottom")):
+            rows = top_n(values, n, largest)
+            views.append(RankView(f"{side} {n} {label}", f"{side} {n} by {column}", column,
+                                  _ranked(projects, rows, np.arange(1, len(rows) + 1))))
+            if not by_ownership:
+                continue
+            rows = grouped_top_n(owners[column].to_numpy(dtype=float), codes, n, largest)
+            grp = codes[rows]
+            starts = np.flatnonzero(np.r_[True, grp[1:] != grp[:-1]])
+            ranks = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)])) + 1
+            frame = _ranked(owners, rows, ranks)
+            views.append(RankView(f"{side} {n} {label} by Owner", f"{side} {n} by {column}",
+                                  column, frame, by_ownership=True))
+    return views
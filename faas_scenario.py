@@ -0,0 +1,255 @@
+"""
+Vectorized what-if scenarios over the Employee sheet.
+
+The Employee sheet becomes a sparse employee × project involvement matrix
+(CSR arrays, no SciPy needed).  A batch of scenarios is a list of sparse
+changes — time moved between projects, salary raises, added direct
+expenses — and all of them are evaluated together with ``np.bincount``
+reductions into a (scenarios × projects) grid, so thousands of scenarios
+cost one pass instead of thousands of script runs.
+
+    model = ScenarioModel.from_frames(employee_df, client_df, direct_df)
+    batch = model.batch(2)
+    batch.move_time(0, ["E1", "E2"], "Project X", share=0.2)
+    batch.raise_salary(1, model.employees, pct=0.05)
+    result = model.evaluate(batch)
+    result.summary            # scenarios ranked by total Gross Margin
+    result.frame(0)           # per-project gm_df for scenario 0
+"""
+import numpy as np
+import pandas as pd
+
+
+# ───────────────────────────────────────────────
+# CSR helpers
+# ───────────────────────────────────────────────
+def _expand_rows(indptr, rows):
+    """For each requested row, the positions of its stored entries.
+
+    Returns (owner, pos): ``owner[i]`` is the index into ``rows`` that entry
+    ``pos[i]`` belongs to.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + offset
+
+
+# ───────────────────────────────────────────────
+# Scenario batch  (sparse list of changes)
+# ───────────────────────────────────────────────
+class ScenarioBatch:
+    """Changes for ``n`` scenarios; every method may be called many times."""
+
+    def __init__(self, model, n, names=None):
+        self.model = model
+        self.n = n
+        self.names = list(names) if names is not None else [f"Scenario {k + 1}" for k in range(n)]
+        self._moves    = []     # (k, employee, to_project, share, from_project or -1)
+        self._raises   = []     # (k, employee, pct)
+        self._expenses = []     # (k, project, amount)
+
+    @staticmethod
+    def _broadcast(*arrays):
+        return np.broadcast_arrays(*[np.atleast_1d(a) for a in arrays])
+
+    def move_time(self, scenario, employees, to_project, share, from_project=None):
+        """Move ``share`` of involvement (0.2 = 20% FTE) to ``to_project``.
+
+        Time is taken from ``from_project`` when given, otherwise from each
+        employee's current projects in proportion to their involvement.
+        """
+        m = self.model
+        e = m.employee_codes(employees)
+        k, e, share = self._broadcast(scenario, e, share)
+        to_p = np.full(len(e), m.project_codes([to_project])[0])
+        from_p = np.full(len(e), -1 if from_project is None else m.project_codes([from_project])[0])
+        self._moves.append((k, e, to_p, share.astype(float), from_p))
+
+    def raise_salary(self, scenario, employees, pct):
+        """Scale salaries by ``1 + pct`` for the given employees."""
+        k, e, pct = self._broadcast(scenario, self.model.employee_codes(employees), pct)
+        self._raises.append((k, e, pct.astype(float)))
+
+    def add_expense(self, scenario, project, amount):
+        """Add a direct expense to a project."""
+        k, p, amount = self._broadcast(scenario, self.model.project_codes(np.atleast_1d(project)), amount)
+        self._expenses.append((k, p, amount.astype(float)))
+
+    @staticmethod
+    def _stack(parts, width):
+        if not parts:
+            return [np.empty(0)] * width
+        return [np.concatenate(col) for col in zip(*parts)]
+
+
+# ───────────────────────────────────────────────
+# Model
+# ───────────────────────────────────────────────
+class ScenarioModel:
+    """Base-case project totals plus the sparse involvement matrix."""
+
+    def __init__(self, projects, employees, salary, indptr, indices, data,
+                 revenue, cost, expense):
+        self.projects  = projects        # pd.Index, sorted like the outer merge
+        self.employees = employees       # pd.Index of employee labels
+        self.salary    = salary          # (E,)
+        self.indptr, self.indices, self.data = indptr, indices, data   # CSR (E × P)
+        self.revenue, self.cost, self.expense = revenue, cost, expense # (P,)
+
+    @classmethod
+    def from_frames(cls, employee_df, client_df, direct_df, employee_col=None):
+        """Build from the cleaned sheets.
+
+        Employees are identified by ``employee_col`` when given; otherwise
+        each Employee row is its own allocation line (labelled by position).
+        """
+        emp = employee_df[employee_df["Project"].notna()]
+        projects = (pd.Index(client_df["Project"].dropna().unique())
+                    .union(pd.Index(emp["Project"].unique()))
+                    .union(pd.Index(direct_df["Project"].dropna().unique())))
+        p = projects.get_indexer(emp["Project"])
+
+        if employee_col is None:
+            e = np.arange(len(emp))
+            employees = pd.Index(np.arange(len(emp)))
+            salary = emp["Salary"].to_numpy(dtype=float)
+        else:
+            e, employees = pd.factorize(emp[employee_col])
+            salary = emp.groupby(e)["Salary"].first().to_numpy(dtype=float)
+            employees = pd.Index(employees)
+        salary = np.nan_to_num(salary)
+        inv = np.nan_to_num(emp["Involvement"].to_numpy(dtype=float))
+
+        order = np.lexsort((p, e))
+        indptr = np.r_[0, np.cumsum(np.bincount(e, minlength=len(employees)))].astype(np.int64)
+
+        def per_project(df, col):
+            s = df.groupby("Project")[col].sum()
+            return s.reindex(projects, fill_value=0).fillna(0).to_numpy(dtype=float)
+
+        return cls(projects, employees, salary, indptr, p[order], inv[order],
+                   per_project(client_df, "Revenue"),
+                   per_project(emp, "Cost"),
+                   per_project(direct_df, "Direct Expense"))
+
+    # Label lookups ────────────────────────────────
+    def employee_codes(self, labels):
+        codes = self.employees.get_indexer(np.atleast_1d(labels))
+        if (codes < 0).any():
+            raise KeyError(f"Unknown employees: {list(np.atleast_1d(labels)[codes < 0])[:5]}")
+        return codes
+
+    def project_codes(self, labels):
+        codes = self.projects.get_indexer(np.atleast_1d(labels))
+        if (codes < 0).any():
+            raise KeyError(f"Unknown projects: {list(np.atleast_1d(labels)[codes < 0])[:5]}")
+        return codes
+
+    def batch(self, n, names=None):
+        return ScenarioBatch(self, n, names)
+
+    # Evaluation ───────────────────────────────────
+    def evaluate(self, batch):
+        K, P = batch.n, len(self.projects)
+        E = len(self.employees)
+        flat = lambda k, p: k.astype(np.int64) * P + p.astype(np.int64)
+        grid = lambda idx, w: np.bincount(idx, weights=w, minlength=K * P).reshape(K, P)
+
+        # Salary raises: ΔC[k, p] = Σ_e Δs[k, e] · I[e, p]
+        rk, re_, rpct = batch._stack(batch._raises, 3)
+        rk, re_ = rk.astype(np.int64), re_.astype(np.int64)
+        d_salary = self.salary[re_] * rpct
+        owner, pos = _expand_rows(self.indptr, re_)
+        d_cost = grid(flat(rk[owner], self.indices[pos]), d_salary[owner] * self.data[pos])
+
+        # Salary each (scenario, employee) pays after raises, for moved time
+        raise_key = rk * E + re_
+        order = np.argsort(raise_key, kind="stable")
+        uniq, first = np.unique(raise_key[order], return_index=True)
+        raise_total = np.add.reduceat(d_salary[order], first) if len(first) else first
+
+        def salary_after(k, e):
+            pay = self.salary[e].copy()
+            if len(uniq):
+                key = k * E + e
+                i = np.minimum(np.searchsorted(uniq, key), len(uniq) - 1)
+                hit = uniq[i] == key
+                pay[hit] += raise_total[i[hit]]
+            return pay
+
+        # Time moves: +share on the target, −share on the source project(s)
+        mk, me, mto, mshare, mfrom = batch._stack(batch._moves, 5)
+        mk, me, mto, mfrom = (a.astype(np.int64) for a in (mk, me, mto, mfrom))
+        pay = salary_after(mk, me)
+        idx, w = [flat(mk, mto)], [pay * mshare]
+
+        fixed = mfrom >= 0
+        idx.append(flat(mk[fixed], mfrom[fixed]))
+        w.append(-pay[fixed] * mshare[fixed])
+
+        prop = np.flatnonzero(~fixed)
+        owner, pos = _expand_rows(self.indptr, me[prop])
+        row_total = np.bincount(owner, weights=self.data[pos], minlength=len(prop))
+        frac = np.divide(self.data[pos], row_total[owner],
+                         out=np.zeros(len(pos)), where=row_total[owner] != 0)
+        src = prop[owner]
+        idx.append(flat(mk[src], self.indices[pos]))
+        w.append(-pay[src] * mshare[src] * frac)
+        d_cost += grid(np.concatenate(idx), np.concatenate(w))
+
+        # Added direct expenses
+        ek, ep, eamt = batch._stack(batch._expenses, 3)
+        d_expense = grid(flat(ek.astype(np.int64), ep.astype(np.int64)), eamt)
+
+        return ScenarioResult(self, batch, self.cost + d_cost, self.expense + d_expense)
+
+
+# ───────────────────────────────────────────────
+# Result
+# ───────────────────────────────────────────────
+class ScenarioResult:
+    def __init__(self, model, batch, cost, expense):
+        self.model   = model
+        self.names   = batch.names
+        self.revenue = model.revenue                   # (P,), unchanged by scenarios
+        self.cost    = cost                            # (K, P)
+        self.expense = expense                         # (K, P)
+        self.gross_margin = self.revenue - cost - expense
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.gross_margin_pct = np.where(self.revenue != 0,
+                                             self.gross_margin / self.revenue, np.nan)
+
+    @property
+    def base_gross_margin(self):
+        m = self.model
+        return float((m.revenue - m.cost - m.expense).sum())
+
+    @property
+    def summary(self):
+        """Scenarios ranked by total Gross Margin (best first)."""
+        total_rev = self.revenue.sum()
+        total_gm  = self.gross_margin.sum(axis=1)
+        df = pd.DataFrame({
+            "Scenario":            self.names,
+            "Gross Margin":        total_gm,
+            "Gross Margin %":      total_gm / total_rev if total_rev else np.nan,
+            "Δ Gross Margin":      total_gm - self.base_gross_margin,
+            "Projects below zero": (self.gross_margin < 0).sum(axis=1),
+        })
+        df = df.sort_values("Gross Margin", ascending=False, kind="stable")
+        df.insert(0, "Rank", np.arange(1, len(df) + 1))
+        return df.reset_index(drop=True)
+
+    def frame(self, k):
+        """Per-project gm_df for scenario ``k``."""
+        return pd.DataFrame({
+            "Project":        self.model.projects,
+            "Revenue":        self.revenue,
+            "Cost":           self.cost[k],
+            "Direct Expense": self.expense[k],
+            "Gross Margin":   self.gross_margin[k],
+            "Gross Margin %": np.round(self.gross_margin_pct[k], 2),
+        })
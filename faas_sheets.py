@@ -0,0 +1,251 @@
+"""
+Read & clean the three input sheets of the FAAS Working File workbook.
+
+Each ``clean_*`` function takes an open ``pd.ExcelFile`` and returns the
+cleaned frame used by the rest of the pipeline, so callers (the main script,
+the sheet cache) can parse only the sheets they need.
+
+Only the columns listed in ``*_COLUMNS`` are parsed, and the calamine reader
+is used when ``python-calamine`` is installed (openpyxl otherwise).  Large
+workbooks are parsed one sheet per worker process: the workers are started
+as ``python faas_sheets.py …`` so they never re-import the main script.
+"""
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from faas_instrument import maybe_stage
+
+EMPLOYEE_SHEET = "Employee"
+CLIENT_SHEET   = "Clinet Name "
+DIRECT_SHEET   = "Direct Expense"
+
+# Columns the pipeline uses (header text, stripped) → "text" or "number".
+# Number columns hold stray text ("n/a", "TBD"), so they are coerced once
+# after parsing; text columns keep whatever the reader inferred.
+EMPLOYEE_COLUMNS = {"Project": "text", "Salary": "number", "Involvement": "number"}
+CLIENT_COLUMNS   = {"Invoice No": "text", "Invoice": "text",       # whichever the sheet has
+                    "Client Name": "text", "Ownership": "text", "Amount": "number"}
+DIRECT_COLUMNS   = {"Client": "text", "Amount": "number"}
+
+# Set by the cleaners: what was wrong with a row's number cells (None if nothing)
+INVALID_COLUMN = "_invalid"
+
+ENGINE = None                   # None → calamine if installed, else openpyxl
+
+# Below this size one process parses all three sheets
+PARALLEL_MIN_MB = 8
+
+
+# ───────────────────────────────────────────────
+# Reader
+# ───────────────────────────────────────────────
+def excel_engine():
+    if ENGINE:
+        return ENGINE
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def open_workbook(path, engine=None):
+    return pd.ExcelFile(path, engine=engine or excel_engine())
+
+
+def _wanted(columns):
+    return lambda name: str(name).strip() in columns
+
+
+def _coerce(df, columns):
+    """Apply the declared number columns in one pass.
+
+    Text in a number cell still becomes NaN, but is also noted in
+    ``INVALID_COLUMN`` (e.g. ``Salary='TBD'``) for the validation stage.
+    So is an empty number cell: the reader has already turned blanks and
+    "n/a" / "NA" / "#N/A" into NaN, so those are noted as ``Salary=blank/n/a``.
+    """
+    invalid = np.full(len(df), None, dtype=object)
+    for name, kind in columns.items():
+        if kind == "number" and name in df:
+            raw = df[name]
+            df[name] = pd.to_numeric(raw, errors="coerce")
+            for i in np.flatnonzero(df[name].isna().to_numpy()):
+                value = raw.iat[i]
+                note = f"{name}=blank/n/a" if pd.isna(value) else f"{name}={value!r}"
+                invalid[i] = note if invalid[i] is None else f"{invalid[i]}; {note}"
+    df[INVALID_COLUMN] = invalid
+    return df
+
+
+# Employee ─────────────────────────────────────
+def clean_employee(xls):
+    employee_df = xls.parse(EMPLOYEE_SHEET, usecols=_wanted(EMPLOYEE_COLUMNS))
+    employee_df.columns = employee_df.columns.str.strip()
+    employee_df = _coerce(employee_df, EMPLOYEE_COLUMNS)
+    employee_df["Cost"] = employee_df["Salary"] * employee_df["Involvement"]
+    return employee_df
+
+
+# Client (revenue) ─────────────────────────────
+def clean_client(xls, group=True):
+    # The header sits in the first data row: find the wanted positions there
+    header = xls.parse(CLIENT_SHEET, header=None, nrows=1).iloc[0]
+    usecols = [i for i, name in enumerate(header) if _wanted(CLIENT_COLUMNS)(name)]
+    client_raw = xls.parse(CLIENT_SHEET, header=None, usecols=usecols)
+    client_raw.columns = client_raw.iloc[0].str.strip()          # promote first row to header
+    client_df = client_raw[1:].copy()
+    client_df = _coerce(client_df, CLIENT_COLUMNS)
+    client_df = client_df.rename(columns={"Client Name": "Project",
+                                          "Amount":      "Revenue",
+                                          "Invoice No":  "Invoice"})
+    if not group:                       # caller groups (e.g. over integer codes)
+        return client_df
+    return group_revenue(client_df)
+
+
+def group_revenue(client_df):
+    # ➡️  GROUP revenue in case of duplicate/valid invoices
+    #client_df = client_df.groupby("Project", as_index=False)["Revenue"].sum()
+    return client_df.groupby(["Project", "Ownership"], as_index=False)["Revenue"].sum()
+
+
+# Direct Expense ───────────────────────────────
+def clean_direct(xls):
+    direct_df = xls.parse(DIRECT_SHEET, usecols=_wanted(DIRECT_COLUMNS))
+    direct_df.columns = direct_df.columns.str.strip()
+    direct_df = _coerce(direct_df, DIRECT_COLUMNS)
+    direct_df = direct_df.rename(columns={"Client": "Project",
+                                          "Amount": "Direct Expense"})
+    return direct_df
+
+
+# sheet name → cleaner, in the order the script returns them
+CLEANERS = {
+    EMPLOYEE_SHEET: clean_employee,
+    CLIENT_SHEET:   clean_client,
+    DIRECT_SHEET:   clean_direct,
+}
+
+
+# ───────────────────────────────────────────────
+# Parallel parsing  (one worker process per sheet)
+# ───────────────────────────────────────────────
+def clean_sheet(xls, sheet):
+    """One cleaned sheet; client rows stay one per invoice."""
+    if sheet == CLIENT_SHEET:
+        return clean_client(xls, group=False)
+    return CLEANERS[sheet](xls)
+
+
+def _start_worker(path, sheet, engine):
+    fd, out_file = tempfile.mkstemp(suffix=".pkl", prefix="faas_sheet_")
+    os.close(fd)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), path, sheet, out_file, "--engine", engine],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    return proc, out_file
+
+
+def _collect(proc, out_file, sheet):
+    """(cleaned frame, parse seconds) from a finished worker."""
+    try:
+        _, err = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"Parsing sheet {sheet!r} failed:\n{err.decode(errors='replace')}")
+        with open(out_file, "rb") as f:
+            return pickle.load(f)
+    finally:
+        os.remove(out_file)
+
+
+def _read_parallel(path, engine, report, sheets=tuple(CLEANERS)):
+    # The first sheet (Employee, usually the largest) is parsed here while the others run in workers
+    first, *rest = sheets
+    workers = {sheet: _start_worker(path, sheet, engine) for sheet in rest}
+    frames = {}
+    with maybe_stage(report, f"2. read {first.strip()}") as st:
+        frames[first] = st.out(clean_sheet(open_workbook(path, engine), first))
+    for sheet, (proc, out_file) in workers.items():
+        df, seconds = _collect(proc, out_file, sheet)
+        if report is not None:
+            report.add(f"2. read {sheet.strip()} (worker)", seconds, rows_out=len(df))
+        frames[sheet] = df
+    return [frames[sheet] for sheet in sheets]
+
+
+def use_parallel(path):
+    """True for workbooks of ``PARALLEL_MIN_MB`` or more on a multi-core machine."""
+    return (os.cpu_count() or 1) > 1 and os.path.getsize(path) >= PARALLEL_MIN_MB * 2**20
+
+
+def clean_sheets(path, sheets, parallel=None, report=None):
+    """``{sheet: clean_sheet(...)}`` for some of the sheets, in parallel like ``read_sheets``."""
+    sheets = [s for s in CLEANERS if s in sheets]
+    engine = excel_engine()
+    if parallel is None:
+        parallel = use_parallel(path)
+    if parallel and len(sheets) > 1:
+        return dict(zip(sheets, _read_parallel(path, engine, report, sheets)))
+    xls = open_workbook(path, engine)
+    frames = {}
+    for sheet in sheets:
+        with maybe_stage(report, f"2. read {sheet.strip()}") as st:
+            frames[sheet] = st.out(clean_sheet(xls, sheet))
+    return frames
+
+
+def read_sheets(path, group_client=True, report=None, parallel=None):
+    """Return (employee_df, client_df, direct_df) parsed from the workbook.
+
+    With ``group_client=False`` client_df keeps one row per invoice.  When a
+    ``RunReport`` is given each sheet is recorded as its own stage.
+    ``parallel`` defaults to on for workbooks of ``PARALLEL_MIN_MB`` or more
+    on a multi-core machine.
+    """
+    engine = excel_engine()
+    if parallel is None:
+        parallel = use_parallel(path)
+    if parallel:
+        employee_df, client_df, direct_df = _read_parallel(path, engine, report)
+        if group_client:
+            client_df = group_revenue(client_df)
+        return employee_df, client_df, direct_df
+
+    with maybe_stage(report, "2. open workbook"):
+        xls = open_workbook(path, engine)
+    with maybe_stage(report, f"2. read {EMPLOYEE_SHEET.strip()}") as st:
+        employee_df = st.out(clean_employee(xls))
+    with maybe_stage(report, f"2. read {CLIENT_SHEET.strip()}") as st:
+        client_df = st.out(clean_client(xls, group=group_client))
+    with maybe_stage(report, f"2. read {DIRECT_SHEET.strip()}") as st:
+        direct_df = st.out(clean_direct(xls))
+    return employee_df, client_df, direct_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse one FAAS sheet (worker for read_sheets)")
+    parser.add_argument("workbook")
+    parser.add_argument("sheet", choices=list(CLEANERS))
+    parser.add_argument("out_file", help="pickled (cleaned frame, seconds) goes here")
+    parser.add_argument("--engine", default=None)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    df = clean_sheet(open_workbook(args.workbook, args.engine), args.sheet)
+    with open(args.out_file, "wb") as f:
+        pickle.dump((df, time.perf_counter() - t0), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""
+Streaming ingestion of the FAAS Working File workbook.
+
+Rows are read one at a time with openpyxl in read-only mode and folded straight
+into per-project accumulators, so memory grows with the number of projects
+instead of the number of rows.  The three frames returned by
+``stream_workbook`` are the same ones the pandas path builds in steps 2-3 of
+``FAAS Output.py`` (``client_df``, ``project_costs``, ``project_expenses``).
+"""
+import math
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from faas_sheets import CLIENT_SHEET, DIRECT_SHEET, EMPLOYEE_SHEET
+
+# Strings pandas' Excel reader turns into NaN (default na_values + Excel errors)
+_NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+    "#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!",
+}
+
+
+# ───────────────────────────────────────────────
+# Cell coercion  (mirrors read_excel + pd.to_numeric(errors="coerce"))
+# ───────────────────────────────────────────────
+def _key(value):
+    """Group key as pandas would see it, or None for a missing key."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return None if value in _NA_STRINGS else value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def _number(value):
+    """Float value of a cell, NaN when it is blank or not numeric."""
+    if value is None:
+        return math.nan
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text in _NA_STRINGS or "_" in text:
+            return math.nan
+        try:
+            return float(text)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+# ───────────────────────────────────────────────
+# Accumulator  (same compensated sum as pandas' groupby().sum())
+# ───────────────────────────────────────────────
+def _mixed_order(key):
+    """Sort key for text mixed with numbers: numbers first, then text, as
+    ``faas_codes._sorted_keys`` (and pandas) order them; tuples element-wise."""
+    if isinstance(key, tuple):
+        return tuple(_mixed_order(k) for k in key)
+    return (isinstance(key, str), key)
+
+
+class ProjectAccumulator:
+    """Running NaN-skipping Kahan sums per group key."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, key, value):
+        slot = self.totals.get(key)
+        if slot is None:
+            slot = self.totals[key] = [0.0, 0.0]
+        if value != value:                   # NaN is skipped, group is kept
+            return
+        y = value - slot[1]
+        t = slot[0] + y
+        comp = t - slot[0] - y
+        slot[1] = 0.0 if comp != comp else comp
+        slot[0] = t
+
+    def __len__(self):
+        return len(self.totals)
+
+    def to_frame(self, keys, value_col):
+        """Sorted frame with one row per key, like groupby(as_index=False)."""
+        try:
+            items = sorted(self.totals.items())
+        except TypeError:                    # e.g. Project 101 next to "P1"
+            items = sorted(self.totals.items(), key=lambda kv: _mixed_order(kv[0]))
+        if len(keys) == 1:
+            data = {keys[0]: [k for k, _ in items]}
+        else:
+            data = {name: [k[i] for k, _ in items] for i, name in enumerate(keys)}
+        data[value_col] = [slot[0] for _, slot in items]
+        return pd.DataFrame(data, columns=[*keys, value_col])
+
+
+# ───────────────────────────────────────────────
+# Sheet readers
+# ───────────────────────────────────────────────
+def _column_index(header, name, sheet):
+    try:
+        return header.index(name)
+    except ValueError:
+        raise KeyError(f"Column {name!r} not found in sheet {sheet!r}") from None
+
+
+def _header(row):
+    return [c.strip() if isinstance(c, str) else c for c in row]
+
+
+def _rows(wb, sheet):
+    """(header, row iterator) for a worksheet, header names stripped."""
+    rows = wb[sheet].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError(f"Sheet {sheet!r} is empty")
+    return _header(header), rows
+
+
+def _cell(row, idx):
+    return row[idx] if idx < len(row) else None
+
+
+def stream_employee_costs(wb, acc=None):
+    """Sum Salary × Involvement per Project from the Employee sheet."""
+    acc = acc if acc is not None else ProjectAccumulator()
+    header, rows = _rows(wb, EMPLOYEE_SHEET)
+    p = _column_index(header, "Project", EMPLOYEE_SHEET)
+    s = _column_index(header, "Salary", EMPLOYEE_SHEET)
+    i = _column_index(header, "Involvement", EMPLOYEE_SHEET)
+    for row in rows:
+        project = _key(_cell(row, p))
+        if project is None:
+            continue
+        acc.add(project, _number(_cell(row, s)) * _number(_cell(row, i)))
+    return acc
+
+
+def stream_client_revenue(wb, acc=None):
+    """Sum Amount per (Client Name, Ownership) from the client sheet."""
+    acc = acc if acc is not None else ProjectAccumulator()
+    header, rows = _rows(wb, CLIENT_SHEET)   # first row promoted to header
+    p = _column_index(header, "Client Name", CLIENT_SHEET)
+    o = _column_index(header, "Ownership", CLIENT_SHEET)
+    a = _column_index(header, "Amount", CLIENT_SHEET)
+    for row in rows:
+        project, owner = _key(_cell(row, p)), _key(_cell(row, o))
+        if project is None or owner is None:
+            continue
+        acc.add((project, owner), _number(_cell(row, a)))
+    return acc
+
+
+def stream_direct_expenses(wb, acc=None):
+    """Sum Amount per Client from the Direct Expense sheet."""
+    acc = acc if acc is not None else ProjectAccumulator()
+    header, rows = _rows(wb, DIRECT_SHEET)
+    p = _column_index(header, "Client", DIRECT_SHEET)
+    a = _column_index(header, "Amount", DIRECT_SHEET)
+    for row in rows:
+        project = _key(_cell(row, p))
+        if project is None:
+            continue
+        acc.add(project, _number(_cell(row, a)))
+    return acc
+
+
+# ───────────────────────────────────────────────
+# Public entry point
+# ───────────────────────────────────────────────
+def stream_workbook(path):
+    """Return (client_df, project_costs, project_expenses) without loading sheets."""
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        costs    = stream_employee_costs(wb)
+        revenue  = stream_client_revenue(wb)
+        expenses = stream_direct_expenses(wb)
+    finally:
+        wb.close()
+
+    client_df        = revenue.to_frame(["Project", "Ownership"], "Revenue")
+    project_costs    = costs.to_frame(["Project"], "Cost")
+    project_expenses = expenses.to_frame(["Project"], "Direct Expense")
+    return client_df, project_costs, project_expenses
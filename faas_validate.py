@@ -0,0 +1,239 @@
+"""
+Validation stage: check the cleaned sheets once, keep a ledger of what was rejected.
+
+Runs on the frames straight out of faas_sheets.py (client rows still one per
+invoice), before anything is aggregated.  Every check is a vectorized mask
+over columns the cleaners already built — text in a number cell is noted in
+``INVALID_COLUMN`` while it is coerced — so validating costs a few passes
+over existing arrays, not copies of the frames:
+
+    Employee        missing or non-numeric Salary / Involvement, Involvement
+                    outside 0-1, negative Salary, no Project
+    Client          missing or non-numeric Amount, duplicate invoice (same
+                    Invoice, Project and Amount; the first is kept), no Project
+    Direct Expense  missing or non-numeric Amount, no Project
+
+Rejected rows are dropped and listed in the ledger instead of being counted
+as zero.  Project keys are normalized once, over the distinct keys only
+(stray / doubled spaces, case), so "Proj 1 " and "proj 1" join "Proj 1".
+Projects with cost but no revenue (or revenue but no cost), an invoice number
+reused on a different line, and every normalized key are listed too, as
+"kept".  A check that cannot run (no Invoice column) is listed as "not
+checked".  ``Row`` is the row number in the workbook.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from faas_sheets import CLIENT_SHEET, DIRECT_SHEET, EMPLOYEE_SHEET, INVALID_COLUMN
+
+LEDGER_COLUMNS = ["Sheet", "Row", "Project", "Check", "Value", "Action"]
+
+# Rows in the cleaned frames follow the workbook from row 2 (below the header)
+FIRST_ROW = 2
+
+
+# ───────────────────────────────────────────────
+# Ledger
+# ───────────────────────────────────────────────
+def _text(values, n):
+    """Ledger cells as text (None stays blank), so every export format takes the column."""
+    if values is None:
+        return [None] * n
+    return [None if v is None or v != v else str(v) for v in values]      # v != v: NaN
+
+
+class Ledger:
+    """Collects ledger entries as small column blocks, one per failed check.
+
+    Project and Value are text: a Value can be an amount, an invoice number
+    or a note, and Parquet needs one type per column.
+    """
+
+    def __init__(self):
+        self.blocks = []
+
+    def add(self, sheet, rows, projects, check, values, action):
+        n = len(projects)
+        if n == 0:
+            return
+        self.blocks.append(pd.DataFrame({
+            "Sheet":   sheet.strip(),
+            "Row":     np.asarray(rows, dtype=object) if rows is not None else [None] * n,
+            "Project": _text(projects, n),
+            "Check":   check,
+            "Value":   _text(values, n),
+            "Action":  action,
+        }))
+
+    def add_rows(self, sheet, df, mask, check, values, action="rejected"):
+        """Ledger entries for the rows of ``df`` where ``mask`` holds."""
+        pos = np.flatnonzero(mask)
+        if len(pos):
+            values = values[pos] if isinstance(values, np.ndarray) else values
+            self.add(sheet, pos + FIRST_ROW, df["Project"].to_numpy()[pos], check, values, action)
+
+    def frame(self):
+        if not self.blocks:
+            return pd.DataFrame(columns=LEDGER_COLUMNS)
+        out = pd.concat(self.blocks, ignore_index=True)
+        out["Row"] = out["Row"].astype("Int64")             # blank for per-project entries
+        return out
+
+
+# ───────────────────────────────────────────────
+# Row checks  (mask of rows to reject)
+# ───────────────────────────────────────────────
+def _invalid(df, sheet, ledger):
+    notes = df[INVALID_COLUMN].to_numpy() if INVALID_COLUMN in df else None
+    if notes is None:
+        return np.zeros(len(df), dtype=bool)
+    bad = pd.notna(notes)
+    ledger.add_rows(sheet, df, bad, "missing or non-numeric", notes)
+    return bad
+
+
+def _no_project(df, sheet, ledger, bad):
+    missing = df["Project"].isna().to_numpy() & ~bad
+    ledger.add_rows(sheet, df, missing, "no project", None)
+    return bad | missing
+
+
+def check_employee(employee_df, ledger):
+    bad = _invalid(employee_df, EMPLOYEE_SHEET, ledger)
+    inv = employee_df["Involvement"].to_numpy(dtype=float)
+    out_of_range = (inv < 0) | (inv > 1)                  # NaN compares False
+    ledger.add_rows(EMPLOYEE_SHEET, employee_df, out_of_range, "Involvement outside 0-1", inv)
+    salary = employee_df["Salary"].to_numpy(dtype=float)
+    negative = salary < 0
+    ledger.add_rows(EMPLOYEE_SHEET, employee_df, negative & ~out_of_range, "negative Salary", salary)
+    return _no_project(employee_df, EMPLOYEE_SHEET, ledger, bad | out_of_range | negative)
+
+
+def check_client(client_df, ledger):
+    bad = _invalid(client_df, CLIENT_SHEET, ledger)
+    if "Invoice" in client_df:
+        invoice = client_df["Invoice"]
+        numbered = invoice.notna().to_numpy()
+        repeat = numbered & invoice.duplicated(keep="first").to_numpy()
+        if repeat.any():
+            same = client_df[["Invoice", "Project", "Revenue"]].duplicated(keep="first").to_numpy()
+            dup = repeat & same & ~bad
+            ledger.add_rows(CLIENT_SHEET, client_df, dup, "duplicate invoice",
+                            invoice.to_numpy())
+            ledger.add_rows(CLIENT_SHEET, client_df, repeat & ~same & ~bad,
+                            "invoice number reused", invoice.to_numpy(), action="kept")
+            bad = bad | dup
+    else:
+        ledger.add(CLIENT_SHEET, None, [None], "duplicate invoice",
+                   ["no Invoice / Invoice No column"], "not checked")
+    return _no_project(client_df, CLIENT_SHEET, ledger, bad)
+
+
+def check_direct(direct_df, ledger):
+    bad = _invalid(direct_df, DIRECT_SHEET, ledger)
+    return _no_project(direct_df, DIRECT_SHEET, ledger, bad)
+
+
+# ───────────────────────────────────────────────
+# Project keys  (normalized once, over distinct keys)
+# ───────────────────────────────────────────────
+def _tidy(key):
+    return " ".join(key.split()) if isinstance(key, str) else key
+
+
+def _fold(key):
+    return " ".join(key.split()).casefold() if isinstance(key, str) else key
+
+
+def normalize_projects(frames, keeps, ledger):
+    """Rewrite each frame's Project to one spelling per normalized key.
+
+    ``frames`` is ``{sheet: df}`` in precedence order (the first spelling
+    seen wins); ``keeps`` the row masks left by the checks.  Returns, per
+    sheet, the set of canonical projects on kept rows.
+    """
+    factorized = {sheet: pd.factorize(df["Project"]) for sheet, df in frames.items()}
+    raw = np.concatenate([np.asarray(u, dtype=object) for _, u in factorized.values()])
+    groups, folded = pd.factorize(pd.Index([_fold(k) for k in raw], dtype=object))
+    first = np.empty(len(folded), dtype=np.int64)
+    first[groups[::-1]] = np.arange(len(groups))[::-1]              # first member of each group
+    spelling = np.empty(len(folded), dtype=object)
+    spelling[:] = [_tidy(raw[i]) for i in first]
+    canon = spelling[groups]
+    changed = np.array([c != r for c, r in zip(canon, raw)], dtype=bool)
+
+    used, start = {}, 0
+    for sheet, df in frames.items():
+        codes, uniques = factorized[sheet]
+        end = start + len(uniques)
+        moved = changed[start:end]
+        if moved.any():
+            df["Project"] = pd.Index(canon[start:end], dtype=object).take(
+                codes, allow_fill=True, fill_value=np.nan)
+            ledger.add(sheet, None, canon[start:end][moved], "project key",
+                       [f"{r!r} → {c!r}" for r, c in
+                        zip(raw[start:end][moved], canon[start:end][moved])], "normalized")
+        kept = codes[keeps[sheet] & (codes >= 0)]
+        present = np.bincount(kept, minlength=len(uniques)) > 0
+        used[sheet] = set(groups[start:end][present])
+        start = end
+    return used, canon, groups
+
+
+def _orphans(used, canon, groups, ledger):
+    position = {}
+    for i, g in enumerate(groups):
+        position.setdefault(g, i)
+    revenue = used[CLIENT_SHEET]
+    cost = used[EMPLOYEE_SHEET] | used[DIRECT_SHEET]
+    for sheet, only, check in ((EMPLOYEE_SHEET, used[EMPLOYEE_SHEET] - revenue, "cost without revenue"),
+                               (DIRECT_SHEET, used[DIRECT_SHEET] - revenue - used[EMPLOYEE_SHEET],
+                                "cost without revenue"),
+                               (CLIENT_SHEET, revenue - cost, "revenue without cost")):
+        keys = [canon[position[g]] for g in sorted(only, key=position.get)]
+        ledger.add(sheet, None, keys, check, [None] * len(keys), "kept")
+
+
+# ───────────────────────────────────────────────
+# Public entry point
+# ───────────────────────────────────────────────
+def validate(employee_df, client_df, direct_df):
+    """(employee_df, client_df, direct_df, ledger_df) with rejected rows removed.
+
+    Expects client_df one row per invoice (``group_client=False``).  The
+    frames are changed in place where possible; rows are only dropped when
+    something was rejected.
+    """
+    ledger = Ledger()
+    frames = {CLIENT_SHEET: client_df, EMPLOYEE_SHEET: employee_df, DIRECT_SHEET: direct_df}
+    checks = {CLIENT_SHEET: check_client, EMPLOYEE_SHEET: check_employee, DIRECT_SHEET: check_direct}
+    keeps = {sheet: ~checks[sheet](df, ledger) for sheet, df in frames.items()}
+
+    used, canon, groups = normalize_projects(frames, keeps, ledger)
+    _orphans(used, canon, groups, ledger)
+
+    for sheet, df in frames.items():
+        if not keeps[sheet].all():
+            df = frames[sheet] = df.loc[keeps[sheet]]
+        if INVALID_COLUMN in df:
+            del df[INVALID_COLUMN]
+    return (frames[EMPLOYEE_SHEET], frames[CLIENT_SHEET], frames[DIRECT_SHEET],
+            ledger.frame())
+
+
+def write_ledger(ledger_df, output_excel_path):
+    """The ledger as ``<output stem>_Rejects.csv`` beside the workbook; returns the path."""
+    path = os.path.splitext(output_excel_path)[0] + "_Rejects.csv"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ledger_df.to_csv(path, index=False)
+    return path
+
+
+def ledger_summary(ledger_df):
+    """One line per (Check, Action) with its count, for the console."""
+    if ledger_df.empty:
+        return "no issues"
+    counts = ledger_df.groupby(["Check", "Action"], sort=False).size()
+    return ", ".join(f"{n:,} {check} ({action})" for (check, action), n in counts.items())
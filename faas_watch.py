@@ -0,0 +1,179 @@
+"""
+Watch mode: stay resident and regenerate the outputs whenever the workbook is saved.
+
+pandas, xlsxwriter and (after the first render) matplotlib stay imported, and
+the last cleaned sheets stay in memory; on each save only the sheets whose
+XML part changed are parsed again.  A save is only acted on once the file's
+size and mtime have been stable for ``--settle`` seconds and it opens as a
+complete .xlsx, so half-synced OneDrive copies are ignored.
+
+    python faas_watch.py "D:/.../FAAS/New/FAAS Working File.xlsx"
+    python faas_watch.py workbook.xlsx --out-dir D:/.../Output --no-png
+"""
+import argparse
+import os
+import time
+import zipfile
+from functools import partial
+
+from faas_batch import period_of
+from faas_cache import sheet_keys
+from faas_codes import encode_sheets, merge_encoded
+from faas_cube import build_cube
+from faas_dashboard import DEFAULT_DPI, VIEWS, render_dashboard
+from faas_export import EXPORT_FORMATS, export_tables
+from faas_margin import add_gross_margin
+from faas_rank import DEFAULT_TOP_N, ranking_views
+from faas_sheets import CLIENT_SHEET, DIRECT_SHEET, EMPLOYEE_SHEET, clean_client, clean_direct, \
+    clean_employee, open_workbook
+from faas_validate import ledger_summary, validate, write_ledger
+
+OUTPUT_XLSX = "Gross_Margin_Output.xlsx"
+OUTPUT_PNG  = "Gross_Margin_Dashboard.png"
+
+# Client rows stay ungrouped; the encoded merge groups them over codes
+WATCH_CLEANERS = {
+    EMPLOYEE_SHEET: clean_employee,
+    CLIENT_SHEET:   partial(clean_client, group=False),
+    DIRECT_SHEET:   clean_direct,
+}
+
+
+# ───────────────────────────────────────────────
+# Change detection
+# ───────────────────────────────────────────────
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _complete(path):
+    """True when the file is a readable zip (a partial sync is not)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return "xl/workbook.xml" in zf.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+class SaveWatcher:
+    """Polls a file and reports a save once it has settled."""
+
+    def __init__(self, path, settle=2.0, poll=0.5):
+        self.path, self.settle, self.poll = path, settle, poll
+        self.seen = None                  # (size, mtime) last acted on
+
+    def wait(self):
+        """Block until the next settled, complete save; returns its (size, mtime)."""
+        pending, since = None, None
+        while True:
+            current = _stat(self.path)
+            if current is not None and current != self.seen:
+                if current != pending:
+                    pending, since = current, time.monotonic()     # still changing
+                elif time.monotonic() - since >= self.settle and _complete(self.path):
+                    self.seen = current
+                    return current
+            time.sleep(self.poll)
+
+
+# ───────────────────────────────────────────────
+# Warm pipeline
+# ───────────────────────────────────────────────
+class WarmPipeline:
+    """Keeps the last cleaned sheets in memory between runs."""
+
+    def __init__(self, workbook, out_dir, fmt="xlsx", png=True, dpi=DEFAULT_DPI,
+                 png_top=None, png_view="project", rank=DEFAULT_TOP_N):
+        self.workbook = workbook
+        self.output_excel_path = os.path.join(out_dir, OUTPUT_XLSX)
+        self.output_chart_path = os.path.join(out_dir, OUTPUT_PNG)
+        self.fmt, self.png = fmt, png
+        self.dpi, self.png_top, self.png_view = dpi, png_top, png_view
+        self.rank = rank
+        self.sheets = {}                  # sheet → (key, cleaned frame)
+
+    def read(self):
+        keys = sheet_keys(self.workbook)
+        xls, parsed = None, []
+        for sheet, clean in WATCH_CLEANERS.items():
+            key = keys.get(sheet)
+            cached = self.sheets.get(sheet)
+            if cached is None or key is None or cached[0] != key:
+                if xls is None:
+                    xls = open_workbook(self.workbook)
+                self.sheets[sheet] = (key, clean(xls))
+                parsed.append(sheet.strip())
+        return [self.sheets[s][1] for s in WATCH_CLEANERS], parsed
+
+    def run(self):
+        t0 = time.perf_counter()
+        frames, parsed = self.read()
+        t1 = time.perf_counter()
+        # Same checks as FAAS Output.py; shallow copies keep the warm frames as parsed
+        employee_df, client_df, direct_df, rejects_df = validate(
+            *(df.copy(deep=False) for df in frames))
+        gm_df = add_gross_margin(merge_encoded(encode_sheets(employee_df, client_df, direct_df)))
+        # Same sheets as FAAS Output.py: the cube's GM % pivot and the ranking views
+        pivot_df = build_cube({period_of(self.workbook): gm_df}).gm_pct_pivot()
+        rank_views = ranking_views(gm_df, self.rank) if self.rank > 0 else []
+        t2 = time.perf_counter()
+        export_tables(gm_df, self.output_excel_path, self.fmt, pivot_df, rank_views, rejects_df)
+        if self.fmt == "xlsx":
+            write_ledger(rejects_df, self.output_excel_path)
+        png = ""
+        if self.png:
+            png = render_dashboard(gm_df, self.output_chart_path, self.dpi,
+                                   self.png_top, self.png_view)
+        t3 = time.perf_counter()
+
+        parsed = ", ".join(parsed) if parsed else "none"
+        print(f"✅ Regenerated in {t3 - t0:.2f}s  (parse {t1 - t0:.2f}s [{parsed}], "
+              f"compute {t2 - t1:.2f}s, export {t3 - t2:.2f}s{', PNG ' + png if png else ''})")
+        print(f"{'✅' if rejects_df.empty else '⚠️'} Validation: {ledger_summary(rejects_df)}")
+        return gm_df
+
+
+def watch(pipeline, watcher):
+    print(f"👀 Watching {pipeline.workbook}  (Ctrl+C to stop)")
+    while True:
+        watcher.wait()
+        print(f"🔄 {time.strftime('%H:%M:%S')} save detected")
+        try:
+            pipeline.run()
+        except Exception as exc:          # keep watching after a bad save
+            print(f"❌ {type(exc).__name__}: {exc}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate Gross Margin outputs on every save")
+    parser.add_argument("workbook", help="FAAS Working File .xlsx to watch")
+    parser.add_argument("--out-dir", default=None, help="output folder (default: next to workbook)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx")
+    parser.add_argument("--no-png", action="store_true")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--png-top", type=int, default=None, metavar="N")
+    parser.add_argument("--png-view", choices=VIEWS, default="project")
+    parser.add_argument("--rank", type=int, default=DEFAULT_TOP_N, metavar="N",
+                        help="top/bottom N sheets by GM %%, GM and Revenue (0 = none)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds the file must be unchanged before a run")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between checks")
+    args = parser.parse_args(argv)
+
+    out_dir = args.out_dir or os.path.dirname(os.path.abspath(args.workbook))
+    pipeline = WarmPipeline(args.workbook, out_dir, args.format, not args.no_png,
+                            args.dpi, args.png_top, args.png_view, args.rank)
+    watcher = SaveWatcher(args.workbook, args.settle, args.poll)
+    try:
+        watch(pipeline, watcher)
+    except KeyboardInterrupt:
+        print("👋 Stopped watching")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())